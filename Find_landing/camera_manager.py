@@ -1,12 +1,189 @@
 
 import threading
 import time
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 # Pi Camera (commented out - using laptop camera instead)
 # from picamera2 import Picamera2
 import cv2  # Using OpenCV for laptop camera
 import numpy as np
 import json
 import os
+import logging
+from functools import lru_cache
+
+
+log = logging.getLogger(__name__)
+
+
+# capture_frame color -> cvtColor code applied to OpenCV's native BGR (None = as decoded)
+COLOR_CONVERSIONS = {
+    'bgr': None,
+    'rgb': cv2.COLOR_BGR2RGB,
+    'gray': cv2.COLOR_BGR2GRAY,
+}
+
+def _readonly(frame):
+    """Mark a returned frame read-only so consumers that draw on it fail loudly instead
+    of corrupting a buffer the manager will reuse"""
+    frame.flags.writeable = False
+    return frame
+
+
+def _to_umat(frame, color, opencl):
+    """Upload a BGR frame to a UMat (a copy, so it outlives the ring slot) and convert it there
+
+    cv2.ocl.setUseOpenCL is per thread, so the camera's 'opencl' setting is
+    applied here, on the thread that asked for the UMat and will keep using it.
+    """
+    cv2.ocl.setUseOpenCL(opencl)
+    umat = cv2.UMat(frame)
+    code = COLOR_CONVERSIONS[color]
+    return umat if code is None else cv2.cvtColor(umat, code)
+
+
+class _RateLimiter:
+    """Let a message key through at most once per interval (for per-frame error paths)"""
+    
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.last_logged = {}  # key -> monotonic time of last emit
+    
+    def allow(self, key):
+        now = time.monotonic()
+        if now - self.last_logged.get(key, float('-inf')) < self.interval:
+            return False
+        self.last_logged[key] = now
+        return True
+
+
+_frame_log_limiter = _RateLimiter()
+
+
+def _decode_raw(raw, dst):
+    """Decode an unconverted driver buffer (YUYV or MJPG) to BGR, into dst when possible"""
+    if raw.ndim == 3 and raw.shape[2] == 2:
+        return cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV, dst=dst)
+    frame = cv2.imdecode(raw.reshape(-1), cv2.IMREAD_COLOR)
+    if frame is not None and frame.shape == dst.shape:
+        np.copyto(dst, frame)
+        return dst
+    return frame
+
+
+def _raw_to_gray(raw, step=1):
+    """Grayscale (optionally every step-th pixel) straight from an undecoded driver buffer
+
+    YUYV interleaves luma with chroma, so the Y plane is already the gray image:
+    taking it with a strided view fuses the conversion and the downsample into a
+    single copy of the surviving pixels. MJPG is decoded directly to one channel.
+    """
+    if raw.ndim == 3 and raw.shape[2] == 2:
+        return np.ascontiguousarray(raw[::step, ::step, 0])
+    gray = cv2.imdecode(raw.reshape(-1), cv2.IMREAD_GRAYSCALE)
+    if gray is not None and step > 1:
+        gray = np.ascontiguousarray(gray[::step, ::step])
+    return gray
+
+
+def _retrieve_bgr(slot, dst):
+    """retrieve() the grabbed frame of slot as BGR, decoding it ourselves in raw mode"""
+    if not slot.raw:
+        return slot.camera.retrieve(dst)
+    ret, raw = slot.camera.retrieve()
+    if not ret:
+        return False, None
+    frame = _decode_raw(raw, dst)
+    return frame is not None, frame
+
+
+# Config keys that become VideoCapture properties, in the order they must be set
+_PLAN_KEYS = ('convert_rgb', 'fourcc', 'size', 'framerate', 'brightness', 'contrast', 'exposure')
+
+
+@lru_cache(maxsize=8)
+def _property_plan(settings):
+    """Turn a (key, value) tuple of capture settings into the exact camera.set() sequence
+
+    Evaluated once per distinct config, so re-opening a camera replays a flat
+    list instead of re-walking the optional keys.
+    """
+    values = dict(settings)
+    plan = []
+    # Raw mode: hand back the driver buffer (YUYV/MJPG) without OpenCV's
+    # conversion; we decode on demand, or not at all for color='raw'
+    if not values['convert_rgb']:
+        plan.append((cv2.CAP_PROP_CONVERT_RGB, 0))
+    # Request compressed frames first: many V4L2 drivers only offer
+    # the larger resolutions/rates for MJPG, so FOURCC must precede size
+    if values.get('fourcc'):
+        plan.append((cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*values['fourcc'])))
+    width, height = values['size']
+    plan.append((cv2.CAP_PROP_FRAME_WIDTH, width))
+    plan.append((cv2.CAP_PROP_FRAME_HEIGHT, height))
+    for key, prop in (('framerate', cv2.CAP_PROP_FPS),
+                      ('brightness', cv2.CAP_PROP_BRIGHTNESS),
+                      ('contrast', cv2.CAP_PROP_CONTRAST),
+                      ('exposure', cv2.CAP_PROP_EXPOSURE)):
+        if key in values:
+            plan.append((prop, values[key]))
+    return tuple(plan)
+
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'camera_config.json')
+_CONFIG_CACHE = None
+
+
+def _load_config(reload=False):
+    """Return camera_config.json as a dict, parsed once and cached ({} if missing/invalid)"""
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None or reload:
+        saved_config = {}
+        if os.path.exists(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, 'r') as f:
+                    saved_config = json.load(f)
+                if 'size' in saved_config and isinstance(saved_config['size'], list):
+                    saved_config['size'] = tuple(saved_config['size'])
+                log.info("✓ Loaded camera config from %s", CONFIG_FILE)
+            except Exception as e:
+                log.warning("⚠ Error loading camera config: %s, using defaults", e)
+                saved_config = {}
+        _CONFIG_CACHE = saved_config
+    return _CONFIG_CACHE
+
+
+class _CamSlot:
+    """Per-camera state, kept in one object so the capture path needs a single dict probe"""
+    __slots__ = ('camera', 'lock', 'config', 'users', 'ring', 'head', 'raw',
+                 'worker', 'stop', 'latest', 'queues', 'produced', 'dropped',
+                 'frame_ts', 'decode_ns', 'failed')
+    
+    def __init__(self, camera, config):
+        self.camera = camera
+        self.lock = threading.Lock()
+        self.config = config
+        self.users = set()
+        width, height = config['size']
+        self.ring = np.empty((config['ring_size'], height, width, 3), dtype=np.uint8)
+        self.head = 0  # next ring slot to fill
+        self.raw = not config['convert_rgb']  # retrieve() returns the undecoded driver buffer
+        self.worker = None  # background capture Thread, when enabled
+        self.stop = None  # Event that stops the capture thread
+        self.latest = None  # newest frame published by the capture thread
+        self.queues = {}  # user_id -> Queue(maxsize=1), newest frame wins
+        self.produced = 0  # frames published by the capture thread
+        self.dropped = 0  # published frames replaced before a consumer took them
+        self.frame_ts = deque(maxlen=64)  # monotonic_ns of recent captures
+        self.decode_ns = deque(maxlen=64)  # grab+retrieve duration of recent captures
+        self.failed = 0  # grab/retrieve failures
+    
+    def record(self, t0_ns):
+        """Note one successful capture that started at t0_ns (one clock read)"""
+        self.frame_ts.append(t0_ns)
+        self.decode_ns.append(time.monotonic_ns() - t0_ns)
 
 
 class CameraManager:
@@ -21,45 +198,55 @@ class CameraManager:
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
-                    cls._instance = super(CameraManager, cls).__new__(cls)
-                    cls._instance._initialized = False
+                    instance = super(CameraManager, cls).__new__(cls)
+                    # State is set up here, under the class lock, exactly once;
+                    # __init__ runs on every CameraManager() call and must not touch it
+                    instance.slots = {}  # camera_id -> _CamSlot
+                    instance._slot_list = []  # dense (camera_id, _CamSlot) snapshot for capture_all
+                    instance._batch_buf = None  # (N, H, W, 3) uint8 buffer reused by capture_all
+                    cls._instance = instance
         return cls._instance
     
-    def __init__(self):
-        if self._initialized:
-            return
-            
-        with self._lock:
-            if not self._initialized:
-                self.cameras = {}  # camera_id -> camera object
-                self.camera_locks = {}  # camera_id -> threading.Lock
-                self.camera_configs = {}  # camera_id -> config dict
-                self.camera_users = {}  # camera_id -> set of user_ids
-                self._initialized = True
-    
     def get_camera(self, camera_id, user_id=None, config=None):
         """Get or initialize camera for given camera_id"""
+        # Fast path: already initialized and user known, no need for the global lock
+        slot = self.slots.get(camera_id)
+        if slot is not None and (not user_id or user_id in slot.users):
+            return slot.camera
+        
         with self._lock:
-            if camera_id not in self.cameras:
+            slot = self.slots.get(camera_id)
+            if slot is None:
                 try:
-                    camera = self._initialize_camera(camera_id, config)
+                    camera, settings = self._initialize_camera(camera_id, config)
                     if camera is None:
                         return None
                     
-                    self.cameras[camera_id] = camera
-                    self.camera_locks[camera_id] = threading.Lock()
-                    self.camera_configs[camera_id] = config or {}
-                    self.camera_users[camera_id] = set()
+                    slot = _CamSlot(camera, settings)
+                    self.slots[camera_id] = slot
+                    self._slot_list = list(self.slots.items())
+                    
+                    if settings.get('capture_thread'):
+                        self._start_capture_thread(camera_id, slot)
                     
-                    print(f"Camera {camera_id} đã được khởi tạo")
+                    log.info("Camera %s đã được khởi tạo", camera_id)
                 except Exception as e:
-                    print(f"Lỗi khởi tạo camera {camera_id}: {e}")
+                    log.error("Lỗi khởi tạo camera %s: %s", camera_id, e)
                     return None
             
             if user_id:
-                self.camera_users[camera_id].add(user_id)
+                slot.users.add(user_id)
             
-            return self.cameras[camera_id]
+            return slot.camera
+    
+    def register_user(self, camera_id, user_id):
+        """Record user_id as a user of an already initialized camera"""
+        with self._lock:
+            slot = self.slots.get(camera_id)
+            if slot is None:
+                return False
+            slot.users.add(user_id)
+            return True
     
     def _initialize_camera(self, camera_id, config=None):
         """Initialize laptop camera using OpenCV"""
@@ -124,113 +311,358 @@ class CameraManager:
             # Default config
             default_config = {
                 'format': 'RGB888',
-                'size': (640, 480)
+                'size': (640, 480),
+                'buffer_size': 1,
+                'ring_size': 4,
+                'fourcc': 'MJPG',
+                'opencl': False,
+                'warmup_timeout': 2.0,
+                'backend': None,
+                'convert_rgb': True,
+                'gray_step': 1
             }
             
-            # Load config from JSON if available
+            # Load config from JSON if available (parsed once per process)
             if config is None:
-                config_file = os.path.join(os.path.dirname(__file__), 'camera_config.json')
-                if os.path.exists(config_file):
-                    try:
-                        with open(config_file, 'r') as f:
-                            saved_config = json.load(f)
-                            if 'size' in saved_config and isinstance(saved_config['size'], list):
-                                saved_config['size'] = tuple(saved_config['size'])
-                            default_config.update(saved_config)
-                            print(f"✓ Loaded camera config from {config_file}")
-                    except Exception as e:
-                        print(f"⚠ Error loading camera config: {e}, using defaults")
+                default_config.update(_load_config())
             
             # Override with provided config
             if config:
                 default_config.update(config)
-                print(f"✓ Using provided camera config: {config}")
+                log.debug("✓ Using provided camera config: %s", config)
             
-            # Initialize OpenCV VideoCapture
-            camera = cv2.VideoCapture(camera_id)
+            # T-API: lets UMat frames (capture_frame(as_umat=True)) run on the iGPU.
+            # setUseOpenCL is per thread, so capture_frame applies it on the calling thread
+            if default_config['opencl'] and not cv2.ocl.haveOpenCL():
+                log.warning("⚠ OpenCL requested but not available, UMat ops stay on CPU")
+                default_config['opencl'] = False
             
-            if not camera.isOpened():
-                print(f"✗ Failed to open camera {camera_id}")
-                return None
+            # Initialize OpenCV VideoCapture ('backend': 'v4l2' skips backend probing)
+            if default_config['backend']:
+                api = getattr(cv2, f"CAP_{default_config['backend'].upper()}")
+                camera = cv2.VideoCapture(camera_id, api)
+            else:
+                camera = cv2.VideoCapture(camera_id)
             
-            # Set resolution
-            width, height = default_config['size']
-            camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-            
-            # Set FPS if specified
-            if 'framerate' in default_config:
-                camera.set(cv2.CAP_PROP_FPS, default_config['framerate'])
-            
-            # Apply brightness and contrast if specified
-            if 'brightness' in default_config:
-                camera.set(cv2.CAP_PROP_BRIGHTNESS, default_config['brightness'])
-            if 'contrast' in default_config:
-                camera.set(cv2.CAP_PROP_CONTRAST, default_config['contrast'])
-            if 'exposure' in default_config:
-                camera.set(cv2.CAP_PROP_EXPOSURE, default_config['exposure'])
+            if not camera.isOpened():
+                log.error("✗ Failed to open camera %s", camera_id)
+                return None, None
+
+            # Keep only the newest frame in the driver queue (default is ~4 frames of lag)
+            if not camera.set(cv2.CAP_PROP_BUFFERSIZE, default_config['buffer_size']):
+                log.warning("⚠ Camera %s backend ignored CAP_PROP_BUFFERSIZE", camera_id)
+
+            # Format, resolution, FPS and image controls, precomputed per config
+            plan_key = tuple((key, tuple(default_config[key]) if key == 'size' else default_config[key])
+                             for key in _PLAN_KEYS if key in default_config)
+            for prop, value in _property_plan(plan_key):
+                camera.set(prop, value)
             
-            # Test capture
+            # Wait for the first frame instead of sleeping a fixed time;
+            # this read doubles as the test capture
+            deadline = time.monotonic() + default_config['warmup_timeout']
             ret, frame = camera.read()
+            while not ret and camera.isOpened() and time.monotonic() < deadline:
+                time.sleep(0.01)
+                ret, frame = camera.read()
             if not ret:
-                print(f"✗ Failed to capture test frame from camera {camera_id}")
+                log.error("✗ Failed to capture test frame from camera %s", camera_id)
                 camera.release()
-                return None
+                return None, None
             
-            actual_width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))
-            actual_height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"✓ Laptop camera {camera_id} initialized: {actual_width}x{actual_height}")
+            if default_config['convert_rgb']:
+                actual_height, actual_width = frame.shape[:2]
+            else:
+                actual_width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))
+                actual_height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            default_config['size'] = (actual_width, actual_height)
+            if log.isEnabledFor(logging.INFO):
+                fourcc = int(camera.get(cv2.CAP_PROP_FOURCC))
+                fourcc_str = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+                log.info("✓ Laptop camera %s initialized: %dx%d (%s)",
+                         camera_id, actual_width, actual_height, fourcc_str)
             
-            time.sleep(0.1)
-            return camera
+            return camera, default_config
             
         except Exception as e:
-            print(f"Lỗi trong _initialize_camera cho camera {camera_id}: {e}")
-            return None
+            log.error("Lỗi trong _initialize_camera cho camera %s: %s", camera_id, e)
+            return None, None
+    
+    def _start_capture_thread(self, camera_id, slot):
+        """Start a background thread that keeps the newest frame of the slot decoded"""
+        slot.stop = threading.Event()
+        slot.worker = threading.Thread(target=self._capture_loop, args=(slot,),
+                                       name=f"capture-{camera_id}", daemon=True)
+        slot.worker.start()
+    
+    def _stop_capture_thread(self, slot):
+        """Signal and join the capture thread of the slot (if any)"""
+        if slot.worker is None:
+            return
+        slot.stop.set()
+        slot.worker.join(timeout=1.0)
+        slot.worker = None
+        slot.latest = None
+        slot.queues.clear()
+    
+    def _capture_loop(self, slot):
+        """Producer: decode once into the next ring slot and fan it out to every consumer"""
+        camera, ring = slot.camera, slot.ring
+        head = 0
+        while not slot.stop.is_set():
+            t0 = time.monotonic_ns()
+            if not camera.grab():
+                slot.failed += 1
+                time.sleep(0.01)
+                continue
+            ret, frame = _retrieve_bgr(slot, ring[head])
+            if not ret:
+                slot.failed += 1
+                continue
+            slot.record(t0)
+            slot.latest = frame
+            slot.produced += 1
+            for q in list(slot.queues.values()):
+                try:
+                    q.put_nowait(frame)
+                except queue.Full:
+                    # Consumer is behind: replace its stale frame with this one
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                    slot.dropped += 1
+                    try:
+                        q.put_nowait(frame)
+                    except queue.Full:
+                        pass
+            head = (head + 1) % len(ring)
     
-    def capture_frame(self, camera_id, user_id=None):
-        """Capture frame from laptop camera"""
-        camera = self.get_camera(camera_id, user_id)
-        if camera is None:
+    def _wait_latest_frame(self, slot, user_id, color='rgb', as_umat=False, timeout=1.0, out=None):
+        """Return the next frame published for user_id, or None on timeout
+
+        Each consumer has its own single-slot queue, so every decoded frame is
+        delivered at most once per user and a slow user only ever sees the
+        newest one.
+        """
+        q = slot.queues.get(user_id)
+        if q is None:
+            q = slot.queues.setdefault(user_id, queue.Queue(maxsize=1))
+        try:
+            frame = q.get(timeout=timeout)
+        except queue.Empty:
             return None
+        # Copy out of the ring: the producer only comes back to this slot
+        # after ring_size - 1 further frames
+        if as_umat:
+            return _to_umat(frame, color, slot.config['opencl'])
+        code = COLOR_CONVERSIONS[color]
+        if out is not None:
+            if code is None:
+                np.copyto(out, frame)
+                return out
+            return cv2.cvtColor(frame, code, dst=out)
+        return _readonly(frame.copy() if code is None else cv2.cvtColor(frame, code))
+    
+    def capture_frame(self, camera_id, user_id=None, skip=0, color='rgb', as_umat=False, out=None):
+        """Capture frame from laptop camera
+
+        color: 'rgb' (default, matches the Pi camera), 'bgr' (OpenCV native,
+        no conversion pass), 'gray', or 'raw' for the undecoded driver buffer
+        (cameras opened with 'convert_rgb': false, without capture thread).
+        In raw mode 'gray' is taken from the luma plane without a BGR decode
+        and is subsampled by the config's 'gray_step'.
+        skip: number of queued frames to grab and discard without decoding
+        before the one that is returned (for consumers sampling below the
+        camera frame rate).
+        as_umat: return a cv2.UMat converted through the T-API (on the GPU
+        when the camera config enables 'opencl') instead of a numpy array.
+        OpenCL use is a per-thread switch in OpenCV: this call sets it on the
+        calling thread to the camera's 'opencl' value (off when disabled,
+        overriding OpenCV's default), so that thread's further UMat work
+        follows the same setting.
+
+        The returned array is read-only. It is a slot of a preallocated
+        per-camera ring and is only valid until ring_size further captures;
+        .copy() it to keep or modify it.
         
-        lock = self.camera_locks.get(camera_id)
-        if lock:
-            with lock:
-                try:
-                    # ========== PI CAMERA CODE (COMMENTED) ==========
-                    # frame = camera.capture_array()
-                    # return frame
-                    # ========== END PI CAMERA CODE ==========
-                    
-                    # ========== LAPTOP CAMERA CODE (OpenCV) ==========
-                    ret, frame = camera.read()
-                    if not ret:
-                        print(f"✗ Failed to read frame from camera {camera_id}")
-                        return None
-                    
-                    # Convert BGR to RGB (OpenCV uses BGR, but Pi camera uses RGB)
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    return frame
-                    # ========== END LAPTOP CAMERA CODE ==========
-                except Exception as e:
-                    print(f"Lỗi capture frame từ camera {camera_id}: {e}")
+        out: caller-owned uint8 array of the frame's shape ('bgr'/'rgb':
+        (H, W, 3), 'gray': (H, W)). The frame is decoded straight into it,
+        with no ring slot and no copy, and out itself is returned (writable).
+        """
+        if color not in COLOR_CONVERSIONS and color != 'raw':
+            raise ValueError(f"Unsupported color {color!r}, expected one of {list(COLOR_CONVERSIONS) + ['raw']}")
+        
+        slot = self.slots.get(camera_id)
+        if slot is None:
+            if self.get_camera(camera_id, user_id) is None:
+                return None
+            slot = self.slots.get(camera_id)
+            if slot is None:
+                return None
+        elif user_id and user_id not in slot.users:
+            self.register_user(camera_id, user_id)
+        
+        if color == 'raw' and (not slot.raw or slot.worker is not None or as_umat):
+            raise ValueError(f"color='raw' needs camera {camera_id} opened with 'convert_rgb': false "
+                             "and no capture thread")
+        if out is not None and (color == 'raw' or as_umat):
+            raise ValueError("out= is only supported for numpy 'bgr', 'rgb' and 'gray' frames")
+        if slot.worker is not None:
+            return self._wait_latest_frame(slot, user_id, color, as_umat, out=out)
+        
+        camera = slot.camera
+        with slot.lock:
+            try:
+                # ========== PI CAMERA CODE (COMMENTED) ==========
+                # frame = camera.capture_array()
+                # return frame
+                # ========== END PI CAMERA CODE ==========
+                
+                # ========== LAPTOP CAMERA CODE (OpenCV) ==========
+                # grab() only dequeues the buffer; decoding happens in retrieve()
+                for _ in range(skip):
+                    camera.grab()
+                t0 = time.monotonic_ns()
+                ret = camera.grab()
+                if ret and color == 'raw':
+                    ret, frame = camera.retrieve()
+                    if ret:
+                        slot.record(t0)
+                        return _readonly(frame)
+                elif ret and slot.raw and color == 'gray' and not as_umat and out is None:
+                    ret, raw = camera.retrieve()
+                    frame = _raw_to_gray(raw, slot.config['gray_step']) if ret else None
+                    if frame is not None:
+                        slot.record(t0)
+                        return _readonly(frame)
+                    ret = False
+                elif ret and out is not None and color != 'gray':
+                    # Decode directly into the caller's buffer, bypassing the ring
+                    ret, frame = _retrieve_bgr(slot, out)
+                elif ret:
+                    ret, frame = _retrieve_bgr(slot, slot.ring[slot.head])
+                    slot.head = (slot.head + 1) % len(slot.ring)
+                if ret:
+                    slot.record(t0)
+                else:
+                    slot.failed += 1
+                    if _frame_log_limiter.allow(('read', camera_id)):
+                        log.warning("✗ Failed to read frame from camera %s", camera_id)
                     return None
-        return None
+                
+                if as_umat:
+                    return _to_umat(frame, color, slot.config['opencl'])
+                
+                # Convert BGR to RGB (OpenCV uses BGR, but Pi camera uses RGB)
+                # in place: the ring slot is ours until the ring wraps
+                if color == 'rgb':
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+                elif color == 'gray':
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=out)
+                if out is not None:
+                    return frame
+                return _readonly(frame)
+                # ========== END LAPTOP CAMERA CODE ==========
+            except Exception as e:
+                if _frame_log_limiter.allow(('capture', camera_id)):
+                    log.error("Lỗi capture frame từ camera %s: %s", camera_id, e)
+                return None
+    
+    def capture_all(self, color='rgb'):
+        """Capture one frame from every active camera into a shared batch buffer
+
+        All cameras must deliver the same frame size. Returns (camera_ids,
+        frames, ok) where frames is an (N, H, W, 3) uint8 array reused by the
+        next call (read-only, .copy() to keep) and ok[i] tells whether
+        frames[i] was filled.
+        """
+        if color not in ('bgr', 'rgb'):
+            raise ValueError(f"capture_all supports 'bgr' or 'rgb', got {color!r}")
+        slot_list = self._slot_list
+        if not slot_list:
+            return [], None, np.zeros(0, dtype=bool)
+        
+        shapes = {slot.ring.shape[1:] for _, slot in slot_list}
+        if len(shapes) != 1:
+            raise ValueError(f"capture_all needs equal frame sizes, got {sorted(shapes)}")
+        batch_shape = (len(slot_list),) + shapes.pop()
+        if self._batch_buf is None or self._batch_buf.shape != batch_shape:
+            self._batch_buf = np.empty(batch_shape, dtype=np.uint8)
+        frames = self._batch_buf
+        ok = np.zeros(len(slot_list), dtype=bool)
+        
+        with ExitStack() as stack:
+            for _, slot in slot_list:
+                stack.enter_context(slot.lock)
+            # First pass latches every sensor, second pass decodes: the
+            # cameras expose their frames in parallel instead of one by one
+            for i, (_, slot) in enumerate(slot_list):
+                if slot.worker is None:
+                    ok[i] = slot.camera.grab()
+            for i, (_, slot) in enumerate(slot_list):
+                if slot.worker is not None:
+                    latest = slot.latest
+                    if latest is not None:
+                        np.copyto(frames[i], latest)
+                        ok[i] = True
+                elif ok[i]:
+                    ok[i], frame = _retrieve_bgr(slot, frames[i])
+                    if ok[i] and frame is not frames[i]:
+                        np.copyto(frames[i], frame)
+        
+        if color == 'rgb':
+            for i in np.flatnonzero(ok):
+                cv2.cvtColor(frames[i], cv2.COLOR_BGR2RGB, dst=frames[i])
+        return [camera_id for camera_id, _ in slot_list], _readonly(frames.view()), ok
+    
+    def get_stats(self, camera_id):
+        """Capture statistics of camera_id over its last 64 frames (None if not active)"""
+        slot = self.slots.get(camera_id)
+        if slot is None:
+            return None
+        ts = list(slot.frame_ts)
+        decode = sorted(slot.decode_ns)
+        span = (ts[-1] - ts[0]) / 1e9 if len(ts) > 1 else 0.0
+        return {
+            'fps': (len(ts) - 1) / span if span > 0 else 0.0,
+            'p50_decode_ms': decode[len(decode) // 2] / 1e6 if decode else 0.0,
+            'p99_decode_ms': decode[min(len(decode) - 1, len(decode) * 99 // 100)] / 1e6 if decode else 0.0,
+            'produced': slot.produced,
+            'dropped': slot.dropped,
+            'failed': slot.failed,
+        }
+    
+    def _log_stats(self, camera_id):
+        """Leave a one-line capture summary in the log before a camera goes away"""
+        stats = self.get_stats(camera_id)
+        if stats and log.isEnabledFor(logging.INFO):
+            log.info("Camera %s stats: %.1f fps, decode p50 %.2f ms / p99 %.2f ms, "
+                     "produced %d, dropped %d, failed %d",
+                     camera_id, stats['fps'], stats['p50_decode_ms'], stats['p99_decode_ms'],
+                     stats['produced'], stats['dropped'], stats['failed'])
     
     def release_camera(self, camera_id, user_id=None):
         """Release camera when no longer needed"""
+        # Unknown camera: nothing to do, don't contend on the global lock (re-checked below)
+        if camera_id not in self.slots:
+            return
+        
         with self._lock:
-            if camera_id not in self.cameras:
+            slot = self.slots.get(camera_id)
+            if slot is None:
                 return
             
-            if user_id and camera_id in self.camera_users:
-                self.camera_users[camera_id].discard(user_id)
+            if user_id:
+                slot.users.discard(user_id)
+                slot.queues.pop(user_id, None)
             
             # Always release if user_id is None (force release) or no users left
-            if user_id is None or not self.camera_users.get(camera_id):
+            if user_id is None or not slot.users:
                 try:
-                    camera = self.cameras[camera_id]
+                    self._log_stats(camera_id)
+                    self._stop_capture_thread(slot)
+                    camera = slot.camera
                     if camera:
                         # ========== PI CAMERA CODE (COMMENTED) ==========
                         # try:
@@ -245,58 +677,66 @@ class CameraManager:
                         
                         # ========== LAPTOP CAMERA CODE (OpenCV) ==========
                         try:
-                            camera.release()
+                            # slot.lock: wait for a capture_frame still reading this camera
+                            with slot.lock:
+                                camera.release()
                         except:
                             pass
                         # ========== END LAPTOP CAMERA CODE ==========
                     
-                    del self.cameras[camera_id]
-                    if camera_id in self.camera_locks:
-                        del self.camera_locks[camera_id]
-                    if camera_id in self.camera_configs:
-                        del self.camera_configs[camera_id]
-                    if camera_id in self.camera_users:
-                        del self.camera_users[camera_id]
-                    
-                    print(f"Camera {camera_id} đã được giải phóng")
+                    del self.slots[camera_id]
+                    self._slot_list = list(self.slots.items())
                     
-                    # Wait a bit for camera to be fully released
-                    time.sleep(0.2)
+                    log.info("Camera %s đã được giải phóng", camera_id)
                 except Exception as e:
-                    print(f"Lỗi giải phóng camera {camera_id}: {e}")
+                    log.error("Lỗi giải phóng camera %s: %s", camera_id, e)
     
     def is_camera_active(self, camera_id):
         """Check if camera is currently active"""
-        return camera_id in self.cameras
+        return camera_id in self.slots
     
     def get_camera_users(self, camera_id):
         """Get set of users currently using the camera"""
-        return self.camera_users.get(camera_id, set()).copy()
+        slot = self.slots.get(camera_id)
+        return slot.users.copy() if slot else set()
+    
+    def _teardown_slot(self, camera_id, slot):
+        """Stop the capture thread of a detached slot and close its device"""
+        try:
+            self._stop_capture_thread(slot)
+            camera = slot.camera
+            if camera:
+                # ========== PI CAMERA CODE (COMMENTED) ==========
+                # camera.stop()
+                # camera.close()
+                # ========== END PI CAMERA CODE ==========
+                
+                # ========== LAPTOP CAMERA CODE (OpenCV) ==========
+                # slot.lock: wait for a capture_frame still reading this camera
+                with slot.lock:
+                    camera.release()
+                # ========== END LAPTOP CAMERA CODE ==========
+            log.info("Camera %s đã được dừng", camera_id)
+        except Exception as e:
+            log.error("Lỗi khi dừng camera %s: %s", camera_id, e)
     
     def release_all_cameras(self):
         """Release all cameras"""
+        # Detach everything under the lock, then close the devices concurrently
+        # without it: each release() blocks on the driver for tens of ms
         with self._lock:
-            camera_ids = list(self.cameras.keys())
-            for camera_id in camera_ids:
-                try:
-                    camera = self.cameras[camera_id]
-                    if camera:
-                        # ========== PI CAMERA CODE (COMMENTED) ==========
-                        # camera.stop()
-                        # camera.close()
-                        # ========== END PI CAMERA CODE ==========
-                        
-                        # ========== LAPTOP CAMERA CODE (OpenCV) ==========
-                        camera.release()
-                        # ========== END LAPTOP CAMERA CODE ==========
-                    print(f"Camera {camera_id} đã được dừng")
-                except Exception as e:
-                    print(f"Lỗi khi dừng camera {camera_id}: {e}")
-            
-            self.cameras.clear()
-            self.camera_locks.clear()
-            self.camera_configs.clear()
-            self.camera_users.clear()
+            items = list(self.slots.items())
+            for camera_id, _ in items:
+                self._log_stats(camera_id)
+            self.slots.clear()
+            self._slot_list = []
+            self._batch_buf = None
+        
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=len(items)) as pool:
+            for camera_id, slot in items:
+                pool.submit(self._teardown_slot, camera_id, slot)
 
 
 # Global singleton instance
@@ -6,37 +6,171 @@ Uses find.py as detection module and camera_manager for camera access
 """
 
 import cv2
+import numpy as np
 import subprocess
 import json
+import logging
+import logging.handlers
 import os
 import sys
 import time
 import platform
+import queue
 from threading import Thread, Event
 import signal
+import shlex
 from urllib.parse import quote
 import shutil
+from functools import lru_cache
+from collections import namedtuple
+
+# find (the detection module) is imported where it is used, so a stream with
+# detection disabled never loads it
+
+
+log = logging.getLogger(__name__)
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Overlay colors (BGR)
+_BLUE = (255, 0, 0)
+_GREEN = (0, 255, 0)
+_RED = (0, 0, 255)
+_YELLOW = (0, 255, 255)
+_MAGENTA = (255, 0, 255)
+_WHITE = (255, 255, 255)
+
+# template path -> (mtime, contour, image); a stream restart reuses the decoded template
+_TEMPLATE_CACHE = {}
+
+
+def _set_timer_resolution(ms):
+    """Windows: request ms-granular sleeps (timeBeginPeriod); returns what to pass to the reset"""
+    if os.name != 'nt':
+        return None
+    try:
+        import ctypes
+        if ctypes.windll.winmm.timeBeginPeriod(ms) == 0:
+            return ms
+    except (ImportError, OSError, AttributeError):
+        pass
+    return None
+
+
+def _reset_timer_resolution(ms):
+    """Undo _set_timer_resolution (every timeBeginPeriod needs a matching timeEndPeriod)"""
+    if ms is not None:
+        import ctypes
+        ctypes.windll.winmm.timeEndPeriod(ms)
+
+
+def _load_template_cached(template_path):
+    """find.load_template, cached until the file's mtime changes"""
+    import find
+    mtime = os.stat(template_path).st_mtime
+    cached = _TEMPLATE_CACHE.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    contour, image = find.load_template(template_path)
+    _TEMPLATE_CACHE[template_path] = (mtime, contour, image)
+    return contour, image
+
+
+@lru_cache(maxsize=256)
+def _text_sprite(text, scale, color, thickness):
+    """Rasterize text once into a (sprite, alpha, 1 - alpha, ascent) tuple for _put_text"""
+    (w, h), baseline = cv2.getTextSize(text, _FONT, scale, thickness)
+    pad = thickness
+    mask = np.zeros((h + baseline + 2 * pad, w + 2 * pad), dtype=np.uint8)
+    cv2.putText(mask, text, (pad, h + pad), _FONT, scale, 255, thickness)
+    # Glyph edges stay 8-bit coverage: some builds anti-alias putText whatever the lineType
+    alpha = mask * np.float32(1 / 255)
+    sprite = np.empty(mask.shape + (3,), dtype=np.uint8)
+    sprite[:] = color
+    return sprite, alpha, 1 - alpha, h + pad
+
+
+def _put_text(frame, text, org, scale, color, thickness):
+    """cv2.putText that blends a cached glyph sprite instead of re-rasterizing the text"""
+    sprite, alpha, inv_alpha, ascent = _text_sprite(text, scale, color, thickness)
+    x0 = org[0] - thickness
+    y0 = org[1] - ascent
+    mh, mw = alpha.shape
+    # Clip to the frame like cv2.putText does
+    fx0, fy0 = max(x0, 0), max(y0, 0)
+    fx1, fy1 = min(x0 + mw, frame.shape[1]), min(y0 + mh, frame.shape[0])
+    if fx0 >= fx1 or fy0 >= fy1:
+        return
+    sy, sx = slice(fy0 - y0, fy1 - y0), slice(fx0 - x0, fx1 - x0)
+    roi = frame[fy0:fy1, fx0:fx1]
+    cv2.blendLinear(sprite[sy, sx], roi, alpha[sy, sx], inv_alpha[sy, sx], dst=roi)
+
+
+# One detection result. Immutable: the detector publishes a new one instead of
+# editing the state a reader may still be drawing from
+DetectionState = namedtuple(
+    'DetectionState',
+    ('detected', 'h_x', 'h_y', 'w', 'h', 'offset_x', 'offset_y', 'similarity',
+     'in_circle', 'circle_center', 'circle_radius', 'direction'),
+    defaults=(False, 0, 0, 0, 0, 0, 0, 0.0, False, None, None, "CENTER"))
+
+_NO_DETECTION = DetectionState()
 
-import find
 
 class CameraStreamer:
     def __init__(self, config_path='camera_config.json'):
         """Initialize camera streamer with configuration"""
         self.config_path = config_path
         self.config = self.load_config()
+        self._cache_config()
         self.running = Event()
-        self.detection_result = None
+        # Latest DetectionState; replaced whole (one attribute store) on every publish,
+        # so grab it once per frame and the fields stay consistent
+        self.det = _NO_DETECTION
         self.gst_process = None
         self.pipe_path = f"/tmp/camera_stream_{os.getpid()}.fifo"
         self.gst_launch_path = self._find_gst_launch()
+        self._encoder = None
         
         self.frames_sent = 0
+        # Finished frames discarded because the pipe/encoder was still busy with older ones
+        self.frames_dropped = 0
         self.detections_count = 0
         self.start_time = None
         
         self.template_contour = None
         self.template_image = None
         
+        # The landing pad barely moves between frames: circles are re-detected
+        # every circle_interval H detections and reused in between
+        self._circle_cache = None
+        self._circle_frame_count = 0
+        
+        # Last H bounding box in detection-image coordinates, used to search a small ROI first
+        self._last_bbox = None
+        
+        # Screen-center crosshair rendered once per frame size: (shape, y, x, sprite, mask)
+        self._crosshair = None
+        
+        # Cached detection overlay: signature of the DetectionState it shows and its blit layer
+        self._overlay_sig = None
+        self._overlay_layer = None
+        self._overlay_canvas = None
+        
+        # 80x45 gray thumbnail of the frame the last detection ran on
+        self._prev_thumb = None
+        
+        # Frame pixels per detection pixel (detection runs at config['detect_width'])
+        self._detect_scale = 1.0
+        
+        # While streaming, `log` records go through a QueueHandler and a listener thread
+        # does the console I/O: a stalled stdout (serial console, full pipe) must not
+        # stall the frame path
+        self._log_listener = None
+        
     def load_config(self):
         """Load configuration from JSON file"""
         default_config = {
@@ -52,7 +186,17 @@ class CameraStreamer:
             'detection_enabled': True,
             'keyframe_interval': 30,
             'preset': 'ultrafast',
-            'tune': 'zerolatency'
+            'tune': 'zerolatency',
+            'circle_interval': 10,
+            'roi_padding': 100,        # full-frame pixels around the last H box searched first
+            'opencv_threads': 2,       # keep OpenCV from oversubscribing cores x264enc needs
+            'cpu_affinity': None,      # e.g. [0, 1]: cores for capture/detect threads (Linux)
+            'gst_cpu_affinity': None,  # e.g. [2, 3]: cores for gst-launch (needs taskset)
+            'encoder': 'auto',         # 'auto' or a GStreamer H.264 encoder element name
+            'pipe_format': 'i420',     # 'i420' (converted in Python, no videoconvert) or 'bgr'
+            'change_threshold': 2.0,   # mean gray-level change below which detection is skipped (0 = off)
+            'circle_roi_scale': 2.0,   # circle search pads the H box by this many H sizes per side (0 = full frame)
+            'detect_width': 640        # detection runs on a gray frame downscaled to this width (0 = full res)
         }
         
         if os.path.exists(self.config_path):
@@ -88,6 +232,114 @@ class CameraStreamer:
         
         return None
     
+    # Preferred first: Pi V4L2 M2M, Jetson, desktop NVIDIA, Intel VA-API, then software
+    ENCODER_CANDIDATES = ('v4l2h264enc', 'nvv4l2h264enc', 'nvh264enc', 'vaapih264enc', 'x264enc')
+    
+    def detect_encoder(self):
+        """Pick the H.264 encoder: config['encoder'] or the first installed candidate"""
+        if self._encoder:
+            return self._encoder
+        
+        encoder = self.config.get('encoder', 'auto')
+        if encoder == 'auto':
+            encoder = 'x264enc'
+            gst_inspect = None
+            if self.gst_launch_path:
+                gst_inspect = os.path.join(os.path.dirname(self.gst_launch_path),
+                                           os.path.basename(self.gst_launch_path).replace('gst-launch', 'gst-inspect'))
+            if not gst_inspect or not os.path.exists(gst_inspect):
+                gst_inspect = shutil.which('gst-inspect-1.0')
+            if gst_inspect:
+                for candidate in self.ENCODER_CANDIDATES:
+                    try:
+                        found = subprocess.run([gst_inspect, candidate], stdout=subprocess.DEVNULL,
+                                               stderr=subprocess.DEVNULL, timeout=10).returncode == 0
+                    except (OSError, subprocess.TimeoutExpired):
+                        found = False
+                    if found:
+                        encoder = candidate
+                        break
+        
+        print(f" H.264 encoder: {encoder}")
+        self._encoder = encoder
+        return encoder
+    
+    def _pipe_format(self):
+        """Raw format written to GStreamer: I420 needs even dimensions, otherwise BGR"""
+        width, height = self.config['size']
+        if self.config.get('pipe_format', 'i420') == 'i420' and width % 2 == 0 and height % 2 == 0:
+            return 'i420'
+        return 'bgr'
+    
+    def _pipe_frame_bytes(self):
+        """Bytes per frame written to the GStreamer pipe"""
+        width, height = self.config['size']
+        return width * height * 3 // 2 if self._pipe_format() == 'i420' else width * height * 3
+    
+    @staticmethod
+    def _grow_pipe(fd, nbytes):
+        """Linux: enlarge the pipe so a whole frame fits in one write (64 KB by default).
+        
+        Returns the new size, or None where F_SETPIPE_SZ is unavailable.
+        """
+        try:
+            import fcntl
+        except ImportError:
+            return None
+        F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+        try:
+            return fcntl.fcntl(fd, F_SETPIPE_SZ, nbytes)
+        except OSError:
+            pass
+        # Unprivileged processes are capped at pipe-max-size (1 MB by default): take what we can
+        try:
+            with open('/proc/sys/fs/pipe-max-size') as f:
+                return fcntl.fcntl(fd, F_SETPIPE_SZ, min(nbytes, int(f.read())))
+        except (OSError, ValueError):
+            return None
+    
+    def _encoder_chain(self):
+        """Elements from the raw pipe frames to H.264 for the selected encoder"""
+        encoder = self.detect_encoder()
+        bitrate = self.config['bitrate']
+        keyframe_interval = self.config.get('keyframe_interval', 30)
+        is_i420 = self._pipe_format() == 'i420'
+        # The encoder gets its own streaming thread; when it falls behind, old raw
+        # frames are dropped here instead of backing up into our pipe
+        leaky = "queue max-size-buffers=2 leaky=downstream ! "
+        # I420 from the pipe goes straight into the encoder; BGR still needs a conversion
+        to_i420 = "" if is_i420 else "videoconvert ! video/x-raw,format=I420 ! "
+        
+        if encoder == 'v4l2h264enc':
+            return (f"{leaky}{to_i420}"
+                    f"v4l2h264enc extra-controls=controls,video_bitrate={bitrate * 1000},h264_i_frame_period={keyframe_interval} ! "
+                    f"video/x-h264,level=(string)4")
+        if encoder == 'nvv4l2h264enc':
+            # nvvidconv takes I420 from system memory; BGR has to be padded to BGRx first
+            to_nvvidconv = "" if is_i420 else "videoconvert ! video/x-raw,format=BGRx ! "
+            return (f"{leaky}{to_nvvidconv}"
+                    f"nvvidconv ! video/x-raw(memory:NVMM),format=I420 ! "
+                    f"nvv4l2h264enc bitrate={bitrate * 1000} insert-sps-pps=1 iframeinterval={keyframe_interval}")
+        if encoder == 'nvh264enc':
+            return (f"{leaky}{to_i420}"
+                    f"nvh264enc preset=low-latency-hq rc-mode=cbr bitrate={bitrate} gop-size={keyframe_interval}")
+        if encoder == 'vaapih264enc':
+            return (f"{leaky}videoconvert ! video/x-raw,format=NV12 ! "
+                    f"vaapih264enc bitrate={bitrate} keyframe-period={keyframe_interval}")
+        # x264enc on Windows uses speed-preset, not preset
+        return (f"{leaky}{to_i420}"
+                f"x264enc bitrate={bitrate} speed-preset={self.config.get('preset', 'ultrafast')} "
+                f"tune={self.config.get('tune', 'zerolatency')} key-int-max={keyframe_interval}")
+    
+    def _cache_config(self):
+        """Derive the flags and strings the stream loop uses from self.config (call again after editing it)"""
+        self._overlay_enabled = bool(self.config.get('overlay_enabled', True))
+        self._detection_enabled = bool(self.config.get('detection_enabled', True))
+        self._frame_interval_ns = int(1e9 / self.config['framerate'])
+        # URL-encode drone ID to handle special characters
+        self._drone_id_encoded = quote(self.config['drone_id'], safe='')
+        self._rtsp_url = f"rtsp://{self.config['mediamtx_host']}:{self.config['mediamtx_port']}/{self._drone_id_encoded}"
+    
     def save_config(self):
         """Save current configuration to JSON file"""
         try:
@@ -101,12 +353,10 @@ class CameraStreamer:
         """Build GStreamer pipeline for RTSP streaming from Python-processed frames via pipe"""
         width, height = self.config['size']
         fps = self.config['framerate']
-        
-        # URL-encode drone ID to handle special characters
-        drone_id_encoded = quote(self.config['drone_id'], safe='')
+        drone_id_encoded = self._drone_id_encoded
         
         # Use RTSP for publishing to MediaMTX
-        rtsp_url = f"rtsp://{self.config['mediamtx_host']}:{self.config['mediamtx_port']}/{drone_id_encoded}"
+        rtsp_url = self._rtsp_url
         
         # Windows path format for pipe
         pipe_path = self.pipe_path.replace("\\", "\\\\")
@@ -114,10 +364,8 @@ class CameraStreamer:
         # Read raw BGR frames from pipe and encode to H264 (using speed-preset for Windows compatibility)
         pipeline = (
             f"filesrc location={pipe_path} ! "
-            f"rawvideoparse width={width} height={height} format=bgr framerate={fps}/1 ! "
-            f"videoconvert ! video/x-raw,format=I420 ! "
-            f"x264enc bitrate={self.config['bitrate']} speed-preset=ultrafast "
-            f"key-int-max={self.config.get('keyframe_interval', 30)} ! "
+            f"rawvideoparse width={width} height={height} format={self._pipe_format()} framerate={fps}/1 ! "
+            f"{self._encoder_chain()} ! "
             f"h264parse ! "
             f"rtspclientsink location={rtsp_url}"
         )
@@ -137,18 +385,13 @@ class CameraStreamer:
         # Build stdin-based pipeline (fdsrc reads from file descriptor 0)
         width, height = self.config['size']
         fps = self.config['framerate']
-        drone_id_encoded = quote(self.config['drone_id'], safe='')
-        rtsp_url = f"rtsp://{self.config['mediamtx_host']}:{self.config['mediamtx_port']}/{drone_id_encoded}"
         
-        # x264enc on Windows uses speed-preset, not preset
         pipeline = (
             f"fdsrc fd=0 ! "
-            f"rawvideoparse width={width} height={height} format=bgr framerate={fps}/1 ! "
-            f"videoconvert ! video/x-raw,format=I420 ! "
-            f"x264enc bitrate={self.config['bitrate']} speed-preset=ultrafast "
-            f"key-int-max={self.config.get('keyframe_interval', 30)} ! "
+            f"rawvideoparse width={width} height={height} format={self._pipe_format()} framerate={fps}/1 ! "
+            f"{self._encoder_chain()} ! "
             f"h264parse ! "
-            f"rtspclientsink location={rtsp_url}"
+            f"rtspclientsink location={self._rtsp_url}"
         )
         
         # Check if GStreamer is available
@@ -162,14 +405,24 @@ class CameraStreamer:
             print("   - C:\\Program Files\\GStreamer\\1.0\\bin")
             return False
         
+        # Use gst-launch-1.0 with full path; -e turns SIGINT into EOS so the encoder flushes
+        cmd = [self.gst_launch_path, '-e'] + shlex.split(pipeline)
+        gst_cores = self.config.get('gst_cpu_affinity')
+        if gst_cores and shutil.which('taskset'):
+            cmd = ['taskset', '-c', ','.join(str(c) for c in gst_cores)] + cmd
+        
+        # Own process group: stop() can signal gst-launch (and taskset's child)
+        # without our Ctrl+C reaching it first
+        if os.name == 'posix':
+            group_kwargs = {'start_new_session': True}
+        else:
+            group_kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        
         max_retries = 3
         retry_count = 0
         
         while retry_count < max_retries:
             try:
-                # Use gst-launch-1.0 with full path
-                cmd = [self.gst_launch_path] + pipeline.split(" ")
-                
                 if retry_count == 0:
                     print(f" Using GStreamer: {self.gst_launch_path}")
                 else:
@@ -178,14 +431,19 @@ class CameraStreamer:
                 self.gst_process = subprocess.Popen(
                     cmd,
                     stdin=pipe_stdin,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    **group_kwargs
                 )
                 
                 time.sleep(2)  # Wait for GStreamer to connect to pipe
                 
                 if self.gst_process.poll() is None:
                     print(" GStreamer pipeline running (waiting for frames...)")
+                    # Nobody reads stderr after this point: drain it, or gst-launch blocks
+                    # on its next warning once the pipe buffer fills
+                    Thread(target=self._drain_stderr, args=(self.gst_process,),
+                           name="gst-stderr", daemon=True).start()
                     return True
                 else:
                     # Get error output
@@ -207,73 +465,103 @@ class CameraStreamer:
         
         return False
     
-    def draw_overlay(self, frame, detection_result):
-        """Draw detection overlay on frame - same as find.py local mode"""
-        if not self.config.get('overlay_enabled', True) or not detection_result:
+    @staticmethod
+    def _drain_stderr(process):
+        """Forward gst-launch's stderr lines to the log until the process closes it"""
+        with process.stderr:
+            for line in iter(process.stderr.readline, b''):
+                line = line.decode(errors='replace').rstrip()
+                if line:
+                    log.warning("GStreamer: %s", line)
+    
+    def draw_overlay(self, frame, det):
+        """Draw detection overlay (DetectionState) on frame - same as find.py local mode"""
+        if not self._overlay_enabled or det is None:
             return frame
         
-        if not detection_result.get('detected', False):
+        if not det.detected:
             
-            cv2.putText(frame, "SEARCHING...", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            _put_text(frame, "SEARCHING...", (10, 30), 0.7, _YELLOW, 2)
             return frame
         
-        frame_height, frame_width = frame.shape[:2]
+        # The overlay only changes when a new detection is published: rasterize it once
+        # per result and blit the cached layer onto every frame in between
+        sig = (frame.shape, det.h_x, det.h_y, det.w, det.h, det.in_circle, det.circle_center,
+               det.circle_radius, det.offset_x, det.offset_y, det.direction, det.similarity)
+        if sig != self._overlay_sig:
+            self._overlay_layer = self._render_overlay(frame.shape, det)
+            self._overlay_sig = sig
+        
+        ys, xs, sprite, mask, texts = self._overlay_layer
+        cv2.copyTo(sprite, mask, frame[ys, xs])
+        # Text edges blend with the frame underneath, so labels are drawn per frame
+        # (from cached glyph masks) rather than baked into the layer
+        for args in texts:
+            _put_text(frame, *args)
+        
+        return frame
+    
+    def _render_overlay(self, shape, det):
+        """Draw the detection overlay onto a blank canvas; returns (rows, cols, sprite, mask) of its
+        bounding box plus the _put_text arguments of its labels"""
+        canvas = self._overlay_canvas
+        if canvas is None or canvas.shape != shape:
+            canvas = self._overlay_canvas = np.zeros(shape, dtype=np.uint8)
+        else:
+            canvas.fill(0)
+        
+        frame_height, frame_width = shape[:2]
         screen_center_x = frame_width // 2
         screen_center_y = frame_height // 2
         
-        
-        cv2.line(frame, (screen_center_x - 30, screen_center_y), 
-                (screen_center_x + 30, screen_center_y), (255, 0, 0), 2)
-        cv2.line(frame, (screen_center_x, screen_center_y - 30), 
-                (screen_center_x, screen_center_y + 30), (255, 0, 0), 2)
+        self._draw_crosshair(canvas)
+        texts = []
         
         
-        h_x, h_y = detection_result['h_position']
-        w, h = detection_result['h_size']
+        h_x, h_y = det.h_x, det.h_y
+        w, h = det.w, det.h
         
         
-        cv2.rectangle(frame, (h_x - w//2, h_y - h//2), 
-                     (h_x + w//2, h_y + h//2), (0, 255, 0), 3)
+        cv2.rectangle(canvas, (h_x - w//2, h_y - h//2), 
+                     (h_x + w//2, h_y + h//2), _GREEN, 3)
         
         
-        cv2.line(frame, (h_x - 20, h_y), (h_x + 20, h_y), (0, 0, 255), 3)
-        cv2.line(frame, (h_x, h_y - 20), (h_x, h_y + 20), (0, 0, 255), 3)
-        cv2.circle(frame, (h_x, h_y), 8, (0, 0, 255), -1)
+        cv2.line(canvas, (h_x - 20, h_y), (h_x + 20, h_y), _RED, 3)
+        cv2.line(canvas, (h_x, h_y - 20), (h_x, h_y + 20), _RED, 3)
+        cv2.circle(canvas, (h_x, h_y), 8, _RED, -1)
         
         
-        cv2.line(frame, (h_x, h_y), (screen_center_x, screen_center_y), (0, 255, 255), 3)
+        cv2.line(canvas, (h_x, h_y), (screen_center_x, screen_center_y), _YELLOW, 3)
         
         
-        if detection_result.get('in_circle', False) and detection_result.get('circle_center') and detection_result.get('circle_radius'):
-            circle_center = detection_result['circle_center']
-            circle_radius = detection_result['circle_radius']
-            cv2.circle(frame, circle_center, circle_radius, (255, 0, 255), 2)
-            cv2.circle(frame, circle_center, 3, (255, 0, 255), -1)
-            cv2.putText(frame, "LANDING AREA", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+        if det.in_circle and det.circle_center and det.circle_radius:
+            circle_center = det.circle_center
+            circle_radius = det.circle_radius
+            cv2.circle(canvas, circle_center, circle_radius, _MAGENTA, 2)
+            cv2.circle(canvas, circle_center, 3, _MAGENTA, -1)
+            texts.append(("LANDING AREA", (10, 30), 0.7, _MAGENTA, 2))
         
         
-        offset_x = detection_result['offset_x']
-        offset_y = detection_result['offset_y']
-        direction = detection_result['direction']
+        offset_x = det.offset_x
+        offset_y = det.offset_y
+        direction = det.direction
         
-        cv2.putText(frame, f"Offset: X={offset_x:+4d} Y={offset_y:+4d}", 
-                   (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        texts.append((f"Offset: X={offset_x:+4d} Y={offset_y:+4d}", (10, 60), 0.6, _WHITE, 2))
         
         if direction != "CENTER":
-            cv2.putText(frame, f"Move: {direction}", 
-                       (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            texts.append((f"Move: {direction}", (10, 90), 0.7, _YELLOW, 2))
         else:
-            cv2.putText(frame, "ALIGNED!", 
-                       (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            texts.append(("ALIGNED!", (10, 90), 0.7, _GREEN, 2))
         
         
-        sim = detection_result.get('similarity', 0)
-        cv2.putText(frame, f"Score: {sim:.3f}", 
-                   (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        sim = det.similarity
+        texts.append((f"Score: {sim:.3f}", (10, 120), 0.6, _WHITE, 2))
         
-        return frame
+        # Nothing in the overlay is drawn in black, so any non-zero pixel belongs to it
+        mask = canvas.any(axis=2).astype(np.uint8)
+        x, y, w, h = cv2.boundingRect(mask)
+        return (slice(y, y + h), slice(x, x + w),
+                canvas[y:y + h, x:x + w].copy(), mask[y:y + h, x:x + w].copy(), texts)
     
     def capture_and_stream_thread(self, pipe_write_fd):
         """Thread for capturing frames, running detection, and streaming"""
@@ -281,6 +569,17 @@ class CameraStreamer:
         
         camera_id = self.config['camera_id']
         user_id = "streamer"
+        self._cache_config()
+        
+        if self.config.get('opencv_threads'):
+            cv2.setNumThreads(self.config['opencv_threads'])
+        cores = self.config.get('cpu_affinity')
+        if cores and hasattr(os, 'sched_setaffinity'):
+            # Set before the stage threads start so they inherit it
+            try:
+                os.sched_setaffinity(0, cores)
+            except OSError as e:
+                print(f"️  Could not set CPU affinity {cores}: {e}")
         
         cam_manager = get_camera_manager()
         
@@ -304,10 +603,10 @@ class CameraStreamer:
         print(" Camera initialized")
         
         # Load detection template
-        if self.config['detection_enabled']:
+        if self._detection_enabled:
             try:
                 # Load landing config to get template setting
-                landing_config_path = os.path.join(os.path.dirname(__file__), "landing_config.json")
+                landing_config_path = os.path.join(BASE_DIR, "landing_config.json")
                 template_name = "H"  # Default
                 
                 if os.path.exists(landing_config_path):
@@ -320,175 +619,439 @@ class CameraStreamer:
                         print(f"️  Error loading landing config: {e}, using default template H")
                 
                 # Load template file
-                template_path = os.path.join(os.path.dirname(__file__), "templates", f"{template_name}.png")
+                template_path = os.path.join(BASE_DIR, "templates", f"{template_name}.png")
                 if not os.path.exists(template_path):
                     # Fallback to H.png if specified template doesn't exist
                     print(f"️  Template {template_name}.png not found, using H.png")
-                    template_path = os.path.join(os.path.dirname(__file__), "templates", "H.png")
+                    template_path = os.path.join(BASE_DIR, "templates", "H.png")
                 
-                self.template_contour, self.template_image = find.load_template(template_path)
+                self.template_contour, self.template_image = _load_template_cached(template_path)
                 print(f" Detection template loaded: {os.path.basename(template_path)}")
             except Exception as e:
                 print(f"️  Detection init failed: {e}")
                 self.config['detection_enabled'] = False
+                self._detection_enabled = False
         else:
             print("ℹ️  Detection disabled")
         
-        fps_interval = 1.0 / self.config['framerate']
-        last_frame_time = 0
-        frame_count = 0
-        last_stats_time = time.time()
-        self.start_time = time.time()
+        self._start_log_listener()
         
+        # Three stages joined by small latest-wins queues: capture -> overlay -> pipe write.
+        # Detection runs beside them on its own thread, fed a gray copy of the newest
+        # frame whenever it is idle; the overlay draws whatever result is current, so a
+        # slow detection never holds back the stream
+        overlay_q = queue.Queue(maxsize=2)
+        write_q = queue.Queue(maxsize=2)
+        detect_q = queue.Queue(maxsize=1)
+        # Frame buffers cycle capture -> overlay -> write -> back here instead of being
+        # allocated per frame: both queues full plus one buffer held by each stage
+        free_q = queue.Queue()
+        pool_size = overlay_q.maxsize + write_q.maxsize + 3
+        gray_free_q = queue.Queue()
+        stages = [
+            Thread(target=self._overlay_stage, args=(overlay_q, write_q, free_q, detect_q, gray_free_q),
+                   name="streamer-overlay", daemon=True),
+            Thread(target=self._write_stage, args=(write_q, free_q, pipe_write_fd), name="streamer-write", daemon=True),
+            Thread(target=self._detect_worker, args=(detect_q, gray_free_q), name="streamer-detect", daemon=True),
+        ]
         
-        FRAME_SKIP = 3  
+        interval_ns = self._frame_interval_ns
+        self.start_time = time.monotonic()
+        for stage in stages:
+            stage.start()
+        # Windows sleeps in ~15.6 ms ticks by default, which would miss most 33 ms deadlines
+        timer_period = _set_timer_resolution(1)
+        next_deadline_ns = time.monotonic_ns()
         
         try:
             while self.running.is_set():
-                current_time = time.time()
-                if current_time - last_frame_time < fps_interval:
-                    time.sleep(0.001)
-                    continue
-                
-                last_frame_time = current_time
-                
+                # Sleep once until the next frame slot instead of polling every millisecond
+                dt = next_deadline_ns - time.monotonic_ns()
+                if dt > 0:
+                    time.sleep(dt / 1e9)
+                # After a slow capture, restart the schedule from now rather than bursting to catch up
+                next_deadline_ns = max(next_deadline_ns + interval_ns, time.monotonic_ns())
                 
-                frame = cam_manager.capture_frame(camera_id, user_id)
-                if frame is None:
+                # Ask for OpenCV's native BGR: no RGB round trip before detection/encode
+                if pool_size:
+                    # Size the pool from the first frame: the camera may not honour config['size']
+                    frame_bgr = cam_manager.capture_frame(camera_id, user_id, color='bgr')
+                    if frame_bgr is None:
+                        continue
+                    for _ in range(pool_size):
+                        free_q.put(np.empty_like(frame_bgr))
+                    # Gray frames for detection: one queued, one being detected, one being filled.
+                    # find's pixel thresholds (min sizes, margins) were tuned on 640-wide frames,
+                    # so detection works at detect_width and results are scaled back up
+                    height, width = frame_bgr.shape[:2]
+                    detect_width = min(self.config.get('detect_width') or width, width)
+                    detect_height = int(round(height * detect_width / width))
+                    self._detect_scale = width / detect_width
+                    for _ in range(detect_q.maxsize + 2):
+                        gray_free_q.put(np.empty((detect_height, detect_width), dtype=np.uint8))
+                    pool_size = 0
+                    buf = free_q.get()
+                    np.copyto(buf, frame_bgr)
+                else:
+                    try:
+                        buf = free_q.get(timeout=1.0)
+                    except queue.Empty:
+                        continue
+                    # Decode straight into our buffer: no ring slot, no copy
+                    frame_bgr = cam_manager.capture_frame(camera_id, user_id, color='bgr', out=buf)
+                    if frame_bgr is None:
+                        free_q.put_nowait(buf)
+                        continue
+                    buf = frame_bgr
+                self._put_latest(overlay_q, buf, free_q)
+                    
+        except Exception as e:
+            log.exception("✗ Capture error: %s", e)
+        finally:
+            # None tells the next stage to finish; it forwards it down the line
+            self._put_latest(overlay_q, None)
+            _reset_timer_resolution(timer_period)
+            for stage in stages:
+                stage.join(timeout=5)
+            self._stop_log_listener()
+            cam_manager.release_camera(camera_id, user_id)
+            print(" Camera released")
+    
+    def _start_log_listener(self):
+        """Route `log` through a queue to the configured handlers (a stdout handler if none)"""
+        if self._log_listener is not None:
+            return
+        handlers = logging.getLogger().handlers
+        if not handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            handlers = [handler]
+            # Logging was never configured: keep the stats lines visible
+            if log.level == logging.NOTSET:
+                log.setLevel(logging.INFO)
+        log_q = queue.Queue(-1)
+        log.addHandler(logging.handlers.QueueHandler(log_q))
+        log.propagate = False
+        self._log_listener = logging.handlers.QueueListener(log_q, *handlers, respect_handler_level=True)
+        self._log_listener.start()
+    
+    def _stop_log_listener(self):
+        """Flush queued records and hand `log` back to normal propagation"""
+        if self._log_listener is None:
+            return
+        self._log_listener.stop()
+        self._log_listener = None
+        for handler in [h for h in log.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+            log.removeHandler(handler)
+        log.propagate = True
+    
+    @staticmethod
+    def _put_latest(q, item, free_q=None):
+        """Put item without blocking, dropping the oldest queued frame when full.
+        
+        A dropped frame buffer goes back to free_q so the pool never runs dry.
+        Returns the number of frames dropped.
+        """
+        dropped_count = 0
+        while True:
+            try:
+                q.put_nowait(item)
+                return dropped_count
+            except queue.Full:
+                try:
+                    dropped = q.get_nowait()
+                except queue.Empty:
                     continue
+                if dropped is not None:
+                    dropped_count += 1
+                    if free_q is not None:
+                        free_q.put_nowait(dropped)
+    
+    def _overlay_stage(self, overlay_q, write_q, free_q, detect_q, gray_free_q):
+        """Stage thread: hand frames to the detector when it is idle and draw the current overlay"""
+        small_bgr = None
+        while True:
+            frame_bgr = overlay_q.get()
+            if frame_bgr is None:
+                self._put_latest(detect_q, None)
+                self._put_latest(write_q, None)
+                return
+            
+            if self._detection_enabled and detect_q.empty():
+                # The detector gets its own gray copy: this frame is drawn on and then recycled
+                try:
+                    gray = gray_free_q.get_nowait()
+                except queue.Empty:
+                    gray = None
+                if gray is not None:
+                    if gray.shape == frame_bgr.shape[:2]:
+                        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY, dst=gray)
+                    else:
+                        # Shrink first so the color conversion touches a quarter of the pixels
+                        if small_bgr is None:
+                            small_bgr = np.empty(gray.shape + (3,), dtype=np.uint8)
+                        cv2.resize(frame_bgr, (gray.shape[1], gray.shape[0]), dst=small_bgr,
+                                   interpolation=cv2.INTER_AREA)
+                        cv2.cvtColor(small_bgr, cv2.COLOR_BGR2GRAY, dst=gray)
+                    self._put_latest(detect_q, gray, gray_free_q)
+            
+            if self._overlay_enabled:
+                det = self.det
+                if det.detected:
+                    frame_bgr = self.draw_overlay(frame_bgr, det)
+                elif self._detection_enabled:
+                    
+                    _put_text(frame_bgr, "SEARCHING...", (10, 30), 0.7, _YELLOW, 2)
+            
+            # The writer blocks on a full pipe while the encoder catches up; newer frames
+            # replace the queued ones meanwhile, so latency stays bounded
+            self.frames_dropped += self._put_latest(write_q, frame_bgr, free_q)
+    
+    def _draw_crosshair(self, frame):
+        """Blit the static screen-center crosshair instead of rasterizing two lines every frame"""
+        if self._crosshair is None or self._crosshair[0] != frame.shape:
+            frame_height, frame_width = frame.shape[:2]
+            screen_center_x = frame_width // 2
+            screen_center_y = frame_height // 2
+            canvas = np.zeros_like(frame)
+            cv2.line(canvas, (screen_center_x - 30, screen_center_y), 
+                    (screen_center_x + 30, screen_center_y), _BLUE, 2)
+            cv2.line(canvas, (screen_center_x, screen_center_y - 30), 
+                    (screen_center_x, screen_center_y + 30), _BLUE, 2)
+            # Keep only the crosshair's bounding box, not a full-frame mask
+            mask = canvas.any(axis=2).astype(np.uint8)
+            x, y, w, h = cv2.boundingRect(mask)
+            self._crosshair = (frame.shape, slice(y, y + h), slice(x, x + w),
+                               canvas[y:y + h, x:x + w].copy(), mask[y:y + h, x:x + w].copy())
+        
+        _, ys, xs, sprite, mask = self._crosshair
+        cv2.copyTo(sprite, mask, frame[ys, xs])
+    
+    def _detect_worker(self, detect_q, gray_free_q):
+        """Detection thread: run detection on the newest gray frame and publish self.det"""
+        while True:
+            gray = detect_q.get()
+            if gray is None:
+                return
+            try:
+                if self._scene_changed(gray):
+                    self._run_detection(gray)
+            finally:
+                gray_free_q.put_nowait(gray)
+    
+    def _scene_changed(self, gray):
+        """Cheap gate: False when the frame barely differs from the last one detection ran on"""
+        threshold = self.config.get('change_threshold', 0)
+        if not threshold:
+            return True
+        thumb = cv2.resize(gray, (80, 45), interpolation=cv2.INTER_AREA)
+        # Compare with the last *detected* frame, so slow drift still adds up to a re-detect
+        if self._prev_thumb is not None and cv2.norm(thumb, self._prev_thumb, cv2.NORM_L1) < threshold * thumb.size:
+            return False
+        self._prev_thumb = thumb
+        return True
+    
+    def _run_detection(self, gray):
+        """Run H + landing circle detection on one gray frame and publish the result as self.det
+        
+        gray may be downscaled (detect_width); published positions are in full-frame pixels.
+        """
+        try:
+            result = self._locate_H(gray)
+            
+            if result is not None:
                 
-                frame_count += 1
-                
-                
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                k = self._detect_scale
+                x, y, w, h = (int(round(v * k)) for v in result['bbox'])
+                h_x = x + w // 2
+                h_y = y + h // 2
+                h_sim = result['similarity']
                 
+                height, width = (int(round(n * k)) for n in gray.shape[:2])
+                center_x, center_y = width // 2, height // 2
+                offset_x = h_x - center_x
+                offset_y = center_y - h_y  
                 
-                if self.config['detection_enabled'] and (frame_count % FRAME_SKIP == 0):
-                    try:
-                        
-                        results, _, _ = find.recognize_H(
-                            frame_bgr, 
-                            self.template_contour,
-                            threshold=0.5
-                        )
-                        
-                        if results and len(results) > 0:
-                            
-                            result = results[0]
-                            x, y, w, h = result['bbox']
-                            h_x = x + w // 2
-                            h_y = y + h // 2
-                            h_sim = result['similarity']
-                            
-                            height, width = frame_bgr.shape[:2]
-                            center_x, center_y = width // 2, height // 2
-                            offset_x = h_x - center_x
-                            offset_y = center_y - h_y  
-                            
-                            # Check if H is inside a circle (landing pad)
-                            circles = find.detect_circles(frame_bgr)
-                            in_circle = False
-                            circle_center = None
-                            circle_radius = None
-                            if circles and len(circles) > 0:
-                                # Use first detected circle
-                                circle = circles[0]
-                                circle_center = circle.get('center')
-                                
-                                # Handle different circle types (ring, ellipse, circle)
-                                circle_type = circle.get('type', 'circle')
-                                if circle_type == 'ring':
-                                    circle_radius = circle.get('radius_outer', 0)
-                                elif circle_type == 'ellipse':
-                                    axes = circle.get('ellipse_axes', (0, 0))
-                                    circle_radius = max(axes) if axes else 0
-                                else:  # regular circle
-                                    circle_radius = circle.get('radius', 0)
-                                
-                                if circle_center and circle_radius:
-                                    dist_to_circle = ((h_x - circle_center[0])**2 + (h_y - circle_center[1])**2)**0.5
-                                    in_circle = dist_to_circle <= circle_radius
-                            
-                            # Calculate movement direction
-                            direction = self.get_direction(offset_x, offset_y)
-                            
-                            self.detection_result = {
-                                'detected': True,
-                                'h_position': (h_x, h_y),
-                                'h_size': (w, h),
-                                'offset_x': offset_x,
-                                'offset_y': offset_y,
-                                'similarity': h_sim,
-                                'in_circle': in_circle,
-                                'circle_center': circle_center,
-                                'circle_radius': circle_radius,
-                                'direction': direction
-                            }
-                            self.detections_count += 1
-                        else:
-                            self.detection_result = {'detected': False}
-                            
-                    except Exception as e:
-                        print(f"️  Detection error: {e}")
+                # Check if H is inside a circle (landing pad)
+                if self._circle_cache is None or self._circle_frame_count % self.config['circle_interval'] == 0:
+                    self._circle_cache = self._detect_circles_near(gray, result['bbox'])
+                self._circle_frame_count += 1
+                circles = self._circle_cache
+                in_circle = False
+                circle_center = None
+                circle_radius = None
+                if circles and len(circles) > 0:
+                    # Use first detected circle
+                    circle = circles[0]
+                    circle_center = circle.get('center')
+                    
+                    # Handle different circle types (ring, ellipse, circle)
+                    circle_type = circle.get('type', 'circle')
+                    if circle_type == 'ring':
+                        circle_radius = circle.get('radius_outer', 0)
+                    elif circle_type == 'ellipse':
+                        axes = circle.get('ellipse_axes', (0, 0))
+                        circle_radius = max(axes) if axes else 0
+                    else:  # regular circle
+                        circle_radius = circle.get('radius', 0)
+                    
+                    if circle_center and k != 1.0:
+                        circle_center = (int(round(circle_center[0] * k)), int(round(circle_center[1] * k)))
+                        circle_radius = int(round(circle_radius * k))
+                    
+                    if circle_center and circle_radius:
+                        # Compare squared distances: integer math, no sqrt
+                        dx = h_x - circle_center[0]
+                        dy = h_y - circle_center[1]
+                        in_circle = dx * dx + dy * dy <= circle_radius * circle_radius
                 
+                # Calculate movement direction
+                direction = self.get_direction(offset_x, offset_y)
                 
-                if self.config.get('overlay_enabled', True):
-                    if self.detection_result and self.detection_result.get('detected'):
-                        frame_bgr = self.draw_overlay(frame_bgr, self.detection_result)
-                    elif self.config['detection_enabled']:
-                        
-                        cv2.putText(frame_bgr, "SEARCHING...", (10, 30), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                self.det = DetectionState(True, h_x, h_y, w, h, offset_x, offset_y, h_sim,
+                                          in_circle, circle_center, circle_radius, direction)
+            else:
+                self.det = _NO_DETECTION
                 
+        except Exception as e:
+            log.warning("️  Detection error: %s", e)
+    
+    def _detect_circles_near(self, gray, bbox):
+        """find.detect_circles on a window around the H box; centers/bboxes in gray-image coordinates"""
+        import find
+        scale = self.config.get('circle_roi_scale', 0)
+        if not scale:
+            return find.detect_circles(gray)
+        height, width = gray.shape[:2]
+        x, y, w, h = bbox
+        # The pad ring surrounds the H, so the window must be a few H sizes wide
+        pad = int(max(w, h) * scale)
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + w + pad, width), min(y + h + pad, height)
+        
+        circles = find.detect_circles(gray[y0:y1, x0:x1])
+        for circle in circles:
+            cx, cy = circle['center']
+            circle['center'] = (cx + x0, cy + y0)
+            bx0, by0, bx1, by1 = circle['bbox']
+            circle['bbox'] = (bx0 + x0, by0 + y0, bx1 + x0, by1 + y0)
+        return circles
+    
+    def _search_roi(self, gray, bbox):
+        """Look for the H around bbox (padded by roi_padding); returns the result in gray-image coordinates"""
+        import find
+        # roi_padding is in full-frame pixels; gray may be downscaled to detect_width
+        pad = int(round(self.config['roi_padding'] / self._detect_scale))
+        height, width = gray.shape[:2]
+        x, y, w, h = bbox
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + w + pad, width), min(y + h + pad, height)
+        
+        results, _, _ = find.recognize_H(gray[y0:y1, x0:x1], self.template_contour, threshold=0.5)
+        if not results:
+            return None
+        result = results[0]
+        x, y, w, h = result['bbox']
+        result['bbox'] = (x + x0, y + y0, w, h)
+        return result
+    
+    def _locate_H(self, gray):
+        """Find the H: ROI around the last hit first, then the whole (detect_width) frame"""
+        import find
+        if self._last_bbox is not None:
+            result = self._search_roi(gray, self._last_bbox)
+            if result is not None:
+                self._last_bbox = result['bbox']
+                return result
+        
+        results, _, _ = find.recognize_H(gray, self.template_contour, threshold=0.5)
+        if not results:
+            self._last_bbox = None
+            return None
+        
+        result = results[0]
+        self._last_bbox = result['bbox']
+        return result
+    
+    def _write_stage(self, write_q, free_q, pipe_write_fd):
+        """Stage thread: push finished frames into the GStreamer pipe and report stats"""
+        last_stats_time = time.monotonic()
+        to_i420 = self._pipe_format() == 'i420'
+        i420 = None
+        while True:
+            frame_bgr = write_q.get()
+            if frame_bgr is None:
+                return
+            
+            try:
+                if to_i420:
+                    # Half the bytes of BGR through the pipe, and GStreamer needs no videoconvert
+                    if i420 is None:
+                        height, width = frame_bgr.shape[:2]
+                        i420 = np.empty((height * 3 // 2, width), dtype=np.uint8)
+                    cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2YUV_I420, dst=i420)
+                    self._write_frame(pipe_write_fd, i420)
+                else:
+                    self._write_frame(pipe_write_fd, frame_bgr)
+                self.frames_sent += 1
+                # Per streamed frame, like frames_sent: frames the change gate skips
+                # keep the published result and count with it
+                if self.det.detected:
+                    self.detections_count += 1
+                free_q.put_nowait(frame_bgr)
                 
-                try:
-                    os.write(pipe_write_fd, frame_bgr.tobytes())
-                    self.frames_sent += 1
+                if self.frames_sent == 1:
+                    log.info(" First frame streamed!")
                     
-                    if frame_count == 1:
-                        print(f" First frame streamed!")
-                        
-                except Exception as e:
-                    print(f"✗ Write error: {e}")
-                    break
-                
+            except Exception as e:
+                log.error("✗ Write error: %s", e)
+                self.running.clear()
+                return
+            
+            current_time = time.monotonic()
+            if current_time - last_stats_time >= 5.0:
+                elapsed = current_time - self.start_time
+                fps_actual = self.frames_sent / elapsed
+                detection_rate = (self.detections_count / self.frames_sent * 100) if self.frames_sent > 0 else 0
                 
-                if current_time - last_stats_time >= 5.0:
-                    elapsed = current_time - self.start_time
-                    fps_actual = self.frames_sent / elapsed
-                    detection_rate = (self.detections_count / self.frames_sent * 100) if self.frames_sent > 0 else 0
-                    
-                    print(f" Stats: {self.frames_sent} frames @ {fps_actual:.1f} fps | "
-                          f"Detections: {self.detections_count} ({detection_rate:.1f}%)")
-                    last_stats_time = current_time
-                    
-        except Exception as e:
-            print(f"✗ Capture error: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            cam_manager.release_camera(camera_id, user_id)
-            print(" Camera released")
+                log.info(" Stats: %d frames @ %.1f fps (%d dropped) | Detections: %d (%.1f%%)",
+                         self.frames_sent, fps_actual, self.frames_dropped,
+                         self.detections_count, detection_rate)
+                last_stats_time = current_time
+    
+    @staticmethod
+    def _write_frame(fd, frame):
+        """Write a frame straight from its buffer, without a tobytes() copy"""
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+        view = memoryview(frame).cast('B')
+        # A pipe write can return short (signals, Windows); finish the frame so
+        # rawvideoparse never goes out of step
+        while view:
+            view = view[os.write(fd, view):]
+    
+    # [y index][x index]: index 0 = below -threshold, 1 = within, 2 = above +threshold
+    _DIRECTIONS = (
+        ("LEFT UP", "UP", "RIGHT UP"),
+        ("LEFT", "CENTER", "RIGHT"),
+        ("LEFT DOWN", "DOWN", "RIGHT DOWN"),
+    )
     
     def get_direction(self, offset_x, offset_y, threshold=20):
         """Get direction text from offset values"""
-        direction = ""
-        if abs(offset_x) > threshold:
-            direction += "RIGHT " if offset_x > 0 else "LEFT "
-        if abs(offset_y) > threshold:
-            direction += "DOWN " if offset_y > 0 else "UP "
-        if not direction:
-            direction = "CENTER"
-        return direction.strip()
+        ix = (offset_x > threshold) - (offset_x < -threshold) + 1
+        iy = (offset_y > threshold) - (offset_y < -threshold) + 1
+        return self._DIRECTIONS[iy][ix]
     
     def start(self):
         """Start streaming with detection overlay"""
         if not self.running.is_set():
             self.running.set()
         
+        self._cache_config()
         os_name = platform.system()
         camera_device_display = f"Camera {self.config['camera_id']}" if os_name == "Windows" else f"/dev/video{self.config['camera_id']}"
-        drone_id_encoded = quote(self.config['drone_id'], safe='')
+        drone_id_encoded = self._drone_id_encoded
         
         print("="*60)
         print(" Starting Camera Streamer (Python Processing Mode)")
@@ -499,12 +1062,15 @@ class CameraStreamer:
         print(f" Server: {self.config['mediamtx_host']}:{self.config['mediamtx_port']}")
         print(f" Drone ID: {self.config['drone_id']}")
         print("="*60)
-        print(f"️  Detection: {'ENABLED' if self.config.get('detection_enabled', True) else 'DISABLED'}")
-        print(f"️  Overlay: {'ENABLED' if self.config.get('overlay_enabled', True) else 'DISABLED'}")
+        print(f"️  Detection: {'ENABLED' if self._detection_enabled else 'DISABLED'}")
+        print(f"️  Overlay: {'ENABLED' if self._overlay_enabled else 'DISABLED'}")
         print("="*60)
         
         # Create pipe for stdin streaming (works on Windows and Linux)
         pipe_read, pipe_write = os.pipe()
+        pipe_size = self._grow_pipe(pipe_write, self._pipe_frame_bytes())
+        if pipe_size:
+            print(f" Pipe buffer: {pipe_size // 1024} KB")
         
         # Start capture and detection thread
         capture_thread = Thread(target=self.capture_and_stream_thread, args=(pipe_write,), daemon=False)
@@ -524,7 +1090,7 @@ class CameraStreamer:
         print(f" View at:")
         print(f"   - WebRTC: http://{self.config['mediamtx_host']}:8889/{drone_id_encoded}/whep")
         print(f"   - HLS: http://{self.config['mediamtx_host']}:8888/{drone_id_encoded}/index.m3u8")
-        print(f"   - RTSP: rtsp://{self.config['mediamtx_host']}:{self.config['mediamtx_port']}/{drone_id_encoded}")
+        print(f"   - RTSP: {self._rtsp_url}")
         print("\nPress Ctrl+C to stop...\n")
         
         # Wait for interrupt
@@ -536,8 +1102,9 @@ class CameraStreamer:
                 print(f"\n️  GStreamer stopped unexpectedly (exit code: {self.gst_process.returncode})")
                 self.running.clear()
                 
-        except KeyboardInterrupt:
-            print("\n Stopping camera streamer...")
+        except (KeyboardInterrupt, SystemExit):
+            # signal_handler exits via SystemExit; gst-launch is in its own process
+            # group and never sees the terminal's Ctrl+C, so stop() must signal it
             self.stop()
         finally:
             try:
@@ -556,7 +1123,11 @@ class CameraStreamer:
         # Stop GStreamer
         if self.gst_process:
             try:
-                self.gst_process.terminate()
+                if os.name == 'posix' and self.gst_process.poll() is None:
+                    # SIGINT -> EOS: x264enc/rtspclientsink flush instead of dying mid-GOP
+                    os.killpg(self.gst_process.pid, signal.SIGINT)
+                else:
+                    self.gst_process.terminate()
                 self.gst_process.wait(timeout=5)
                 print(" GStreamer stopped")
             except:
@@ -574,6 +1145,7 @@ def signal_handler(sig, frame):
 
 def main():
     """Main entry point"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
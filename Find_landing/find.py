@@ -1,81 +1,129 @@
 import cv2
+import math
 import numpy as np
 from camera_manager import get_camera_manager
 import time
 from collections import deque
-from threading import Thread
+from threading import Thread, local
 from queue import Queue
 
-import random
-
 
 detection_history = deque(maxlen=10)
-frame_queue = Queue(maxsize=1)
 result_queue = Queue(maxsize=1)
 running = True
-frame_skip_counter = 0
-FRAME_SKIP = 3
 last_stable_result = None
+ROI_MISSES = 5
+DISPLAY_EVERY = 2
+# Filter chains run on UMat only when main() is called with use_opencl=True
+USE_UMAT = False
+
+KERNEL_2 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
+KERNEL_5 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+# Rectangular elements are separable, so OpenCV erodes/dilates them as a row pass plus a column pass
+KERNEL_5_RECT = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+# CLAHE objects keep per-call scratch state, so each thread gets its own
+_clahe_cache = local()
+
+
+def get_clahe(tile):
+    clahes = getattr(_clahe_cache, 'clahes', None)
+    if clahes is None:
+        clahes = _clahe_cache.clahes = {}
+    clahe = clahes.get(tile)
+    if clahe is None:
+        clahe = clahes[tile] = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(tile, tile))
+    return clahe
+
+
+def to_device(gray):
+    # T-API: with USE_UMAT the filters below run through OpenCL on the GPU
+    return cv2.UMat(gray) if USE_UMAT else gray
+
+
+def to_host(image):
+    # findContours and the callers need a numpy array
+    return image.get() if isinstance(image, cv2.UMat) else image
 
 
 def preprocess_image(image):
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(3, 3))
-    enhanced = clahe.apply(gray)
+    enhanced = get_clahe(3).apply(to_device(gray))
     blur = cv2.GaussianBlur(enhanced, (3, 3), 0)
     edges = cv2.Canny(blur, 50, 150)
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
-    edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=1)
-    return edges
+    edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, KERNEL_2, iterations=1)
+    return to_host(edges)
 
 
 
-def fit_circle(points):
-    x = points[:, 0]
-    y = points[:, 1]
-    A = np.c_[2*x, 2*y, np.ones(points.shape[0])]
-    b = x**2 + y**2
-    c, _, _, _ = np.linalg.lstsq(A, b, rcond=None)
-    a, b, c = c
-    center = (a, b)
-    radius = np.sqrt(c + a**2 + b**2)
-    return center, radius
+def _circumcircles(x1, y1, x2, y2, x3, y3):
+    # Circumcircle of each triangle, over arrays of vertices; degenerate ones get r = inf
+    d = 2.0 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    s1 = x1 * x1 + y1 * y1
+    s2 = x2 * x2 + y2 * y2
+    s3 = x3 * x3 + y3 * y3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cx = (s1 * (y2 - y3) + s2 * (y3 - y1) + s3 * (y1 - y2)) / d
+        cy = (s1 * (x3 - x2) + s2 * (x1 - x3) + s3 * (x2 - x1)) / d
+    r = np.hypot(x1 - cx, y1 - cy)
+    r[d == 0] = np.inf
+    return cx, cy, r
 
 def ransac_ring(contour, n_iter=100, threshold=2.0, min_ring_width=10, max_ring_width=80):
     pts = contour.reshape(-1, 2)
-    best_score = 0
-    best_circle_out = None
-    best_circle_in = None
-    for _ in range(n_iter):
-        if len(pts) < 6: break
-        sample = random.sample(range(len(pts)), 6)
-        sample_out = pts[sample[:3]]
-        sample_in = pts[sample[3:]]
-        center_out, r_out = fit_circle(sample_out)
-        center_in, r_in = fit_circle(sample_in)
-        dists_out = np.abs(np.sqrt((pts[:,0]-center_out[0])**2 + (pts[:,1]-center_out[1])**2) - r_out)
-        dists_in = np.abs(np.sqrt((pts[:,0]-center_in[0])**2 + (pts[:,1]-center_in[1])**2) - r_in)
-        score = np.sum(dists_out < threshold) + np.sum(dists_in < threshold)
-        center_dist = np.linalg.norm(np.array(center_out) - np.array(center_in))
-        ring_width = abs(r_out - r_in)
-        if score > best_score and center_dist < 5 and min_ring_width < ring_width < max_ring_width:
-            best_score = score
-            best_circle_out = (center_out, r_out)
-            best_circle_in = (center_in, r_in)
-    if best_circle_out and best_circle_in:
-        return True, best_circle_out, best_circle_in
-    return False, None, None
-
-def detect_circles(image, min_circularity=0.65, min_area=8000, max_ellipse_ratio=2.5, min_points=30):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-    gray = cv2.GaussianBlur(gray, (3, 3), 0)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
-    denoised = cv2.bilateralFilter(enhanced, 5, 25, 25)
+    if len(pts) < 6:
+        return False, None, None
+    pts_x = pts[:, 0].astype(np.float64)
+    pts_y = pts[:, 1].astype(np.float64)
+    # All iterations at once: row i holds the 3 outer + 3 inner sample indices of iteration i.
+    # Repeated indices make a degenerate triple (infinite radius), which the width test rejects
+    samples = np.random.randint(0, len(pts), size=(n_iter, 6))
+    sx = pts_x[samples]
+    sy = pts_y[samples]
+    cx_out, cy_out, r_out = _circumcircles(sx[:, 0], sy[:, 0], sx[:, 1], sy[:, 1], sx[:, 2], sy[:, 2])
+    cx_in, cy_in, r_in = _circumcircles(sx[:, 3], sy[:, 3], sx[:, 4], sy[:, 4], sx[:, 5], sy[:, 5])
+    # Concentricity and width are cheap: only candidates passing them are scored
+    with np.errstate(invalid='ignore'):
+        ring_width = np.abs(r_out - r_in)
+        valid = ((np.hypot(cx_out - cx_in, cy_out - cy_in) < 5)
+                 & (ring_width > min_ring_width) & (ring_width < max_ring_width))
+    candidates = np.flatnonzero(valid)
+    if len(candidates) == 0:
+        return False, None, None
+    scores = np.empty(len(candidates), dtype=np.int64)
+    # The scan is bandwidth-bound, so it runs in float32; the fits above stay float64
+    fx = pts[:, 0].astype(np.float32)
+    fy = pts[:, 1].astype(np.float32)
+    rings = [tuple(v[candidates].astype(np.float32) for v in circle)
+             for circle in ((cx_out, cy_out, r_out), (cx_in, cy_in, r_in))]
+    # Blocks of candidates keep the (block, N) distance rows cache-sized
+    block = 16
+    for start in range(0, len(candidates), block):
+        stop = start + block
+        score = 0
+        for cx, cy, r in rings:
+            dists = np.hypot(fx - cx[start:stop, None], fy - cy[start:stop, None])
+            dists -= r[start:stop, None]
+            score = score + np.count_nonzero(np.abs(dists, out=dists) < threshold, axis=1)
+        scores[start:stop] = score
+    best = np.argmax(scores)  # first of equal scores, like the sequential loop kept
+    if scores[best] == 0:
+        return False, None, None
+    i = candidates[best]
+    return True, ((cx_out[i], cy_out[i]), r_out[i]), ((cx_in[i], cy_in[i]), r_in[i])
+
+def detect_circles(image, min_circularity=0.65, min_area=8000, max_ellipse_ratio=2.5, min_points=30, gray=None,
+                   ransac_threshold=2.0, min_ring_width=10, max_ring_width=80):
+    # gray: optional precomputed grayscale of image, so callers that already have it skip the conversion
+    if gray is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    gray = cv2.GaussianBlur(to_device(gray), (3, 3), 0)
+    enhanced = get_clahe(8).apply(gray)
+    # Otsu only keeps two levels, so edge-preserving bilateral smoothing buys nothing over a median
+    denoised = cv2.medianBlur(enhanced, 3)
     _, binary = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=2)
-    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, KERNEL_5_RECT, iterations=2)
+    binary = to_host(cv2.morphologyEx(binary, cv2.MORPH_OPEN, KERNEL_5, iterations=1))
     contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
     circles = []
     for cnt in contours:
@@ -92,7 +140,8 @@ def detect_circles(image, min_circularity=0.65, min_area=8000, max_ellipse_ratio
             continue
 
         
-        is_ring, circle_out, circle_in = ransac_ring(cnt)
+        is_ring, circle_out, circle_in = ransac_ring(cnt, threshold=ransac_threshold,
+                                                     min_ring_width=min_ring_width, max_ring_width=max_ring_width)
         if is_ring:
             cx, cy = map(int, circle_out[0])
             r_out = int(circle_out[1])
@@ -154,6 +203,22 @@ def detect_circles(image, min_circularity=0.65, min_area=8000, max_ellipse_ratio
     return circles
 
 
+def scale_circle(circle, k, dx=0, dy=0):
+    # Map a detect_circles() result found on a resized image (cropped at dx, dy) back by factor k
+    scaled = dict(circle)
+    cx, cy = circle['center']
+    scaled['center'] = (int((cx + dx) * k), int((cy + dy) * k))
+    x0, y0, x1, y1 = circle['bbox']
+    scaled['bbox'] = (int((x0 + dx) * k), int((y0 + dy) * k), int((x1 + dx) * k), int((y1 + dy) * k))
+    scaled['area'] = circle['area'] * k * k
+    for key in ('radius', 'radius_outer', 'radius_inner'):
+        if key in circle:
+            scaled[key] = int(circle[key] * k)
+    if 'ellipse_axes' in circle:
+        scaled['ellipse_axes'] = tuple(int(a * k) for a in circle['ellipse_axes'])
+    return scaled
+
+
 def load_template(template_path):
     
     template = cv2.imread(template_path, cv2.IMREAD_COLOR)
@@ -165,9 +230,45 @@ def load_template(template_path):
     return template_contour, template
 
 
-def recognize_H(test_image, template_contour, threshold=0.5, min_area=100, max_area=None):
+def hu_signature(contour):
+    # Log-scaled Hu moments as cv2.matchShapes uses them; None marks the terms it skips.
+    # Plain floats: for 7 values the interpreter beats NumPy's per-call overhead
+    sig = []
+    for h in cv2.HuMoments(cv2.moments(contour)).ravel().tolist():
+        mag = abs(h)
+        if mag > 1e-5:
+            sig.append(math.log10(mag) if h > 0 else -math.log10(mag))
+        else:
+            sig.append(None)
+    return sig
+
+
+def match_signatures(sig_a, sig_b):
+    # cv2.matchShapes CONTOURS_MATCH_I1 and _I2 from two hu_signature() lists
+    i1 = i2 = 0.0
+    any_a = any_b = False
+    for a, b in zip(sig_a, sig_b):
+        any_a = any_a or a is not None
+        any_b = any_b or b is not None
+        if a is not None and b is not None:
+            i1 += abs(1 / a - 1 / b)
+            i2 += abs(a - b)
+    if any_a != any_b:
+        # Usable moments on only one side cannot match
+        return math.inf, math.inf
+    return i1, i2
+
+
+def recognize_H(test_image, template_contour, threshold=0.5, min_area=100, max_area=None, gray=None, binary=None,
+                template_hu=None):
     
-    binary = preprocess_image(test_image)
+    # gray: optional precomputed grayscale of test_image (see detect_circles)
+    # binary: optional precomputed preprocess_image(test_image), returned as is
+    # template_hu: optional hu_signature(template_contour), for callers matching many frames
+    if template_hu is None:
+        template_hu = hu_signature(template_contour)
+    if binary is None:
+        binary = preprocess_image(test_image if gray is None else gray)
     
     
     contours, hierarchy = cv2.findContours(binary, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
@@ -179,24 +280,24 @@ def recognize_H(test_image, template_contour, threshold=0.5, min_area=100, max_a
     output_image = test_image.copy()
     
     for i, contour in enumerate(contours):
-        area = cv2.contourArea(contour)
-        
-        if area < min_area or area > max_area:
-            continue
-        
+        # Cheapest tests first: most contours are small noise that fails the box checks
         x, y, w, h = cv2.boundingRect(contour)
+        if w < 30 or h < 30:
+            continue
         margin = 30
         if x < margin or y < margin or (x + w) > (test_image.shape[1] - margin) or (y + h) > (test_image.shape[0] - margin):
             continue
-        if w < 30 or h < 30:
-            continue
         
         aspect_ratio = float(w) / h if h > 0 else 0
         if aspect_ratio < 0.4 or aspect_ratio > 1.8:
             continue
         
-        sim1 = cv2.matchShapes(template_contour, contour, cv2.CONTOURS_MATCH_I1, 0)
-        sim2 = cv2.matchShapes(template_contour, contour, cv2.CONTOURS_MATCH_I2, 0)
+        area = cv2.contourArea(contour)
+        if area < min_area or area > max_area:
+            continue
+        
+        # Both matchShapes metrics from one moments pass (the template side is precomputed)
+        sim1, sim2 = match_signatures(template_hu, hu_signature(contour))
         
         
         similarity = min(sim1, sim2)
@@ -221,48 +322,54 @@ def recognize_H(test_image, template_contour, threshold=0.5, min_area=100, max_a
     return results, output_image, binary
 
 
-def capture_thread(cam_manager, camera_id, user_id):
-    
-    global running, frame_skip_counter
-    while running:
-        try:
-            frame_skip_counter += 1
-            if frame_skip_counter < FRAME_SKIP:
-                time.sleep(0.01)
-                continue
-            
-            frame_skip_counter = 0
-            frame = cam_manager.capture_frame(camera_id, user_id)
-            
-            if frame is not None:
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                
-                if frame_queue.full():
-                    try:
-                        frame_queue.get_nowait()
-                    except:
-                        pass
-                frame_queue.put(frame_bgr)
-            else:
-                time.sleep(0.01)
-        except Exception as e:
-            print(f"Capture error: {e}")
-            time.sleep(0.05)
+def expand_bbox(bbox, shape, factor=0.2):
+    x0, y0, x1, y1 = bbox
+    mx = int((x1 - x0) * factor)
+    my = int((y1 - y0) * factor)
+    return max(0, x0 - mx), max(0, y0 - my), min(shape[1], x1 + mx), min(shape[0], y1 + my)
 
 
-def detection_thread(template_contour, threshold):
+def detection_thread(template_contour, threshold, cam_manager, camera_id, user_id):
     global running
 
+    # setUseOpenCL is per thread, and OpenCV defaults it to on wherever a device exists
+    cv2.ocl.setUseOpenCL(USE_UMAT)
     frames_missed = 0
     n = 10  
+    # Last circle's bbox (half-size level) is searched alone until it misses ROI_MISSES frames
+    circle_roi = None
+    roi_missed = 0
+    # Circle set of the last failed retry pass; the same set is not retried again
+    last_retry_sig = None
+    template_hu = hu_signature(template_contour)
     while running:
         try:
-            if not frame_queue.empty():
-                frame = frame_queue.get()
-                circles = detect_circles(frame, min_circularity=0.65, min_area=8000)
+            # Capture on demand: the newest frame, exactly when detection is ready for it
+            frame = cam_manager.capture_frame(camera_id, user_id, color='bgr')
+            if frame is not None:
+                # One gray conversion and one edge map per frame, shared by every search below
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                # Circles on a half-size pyramid level (pixel thresholds scaled to match),
+                # mapped back so the H search crops the full-resolution frame
+                small = cv2.pyrDown(gray)
+                rx0, ry0, rx1, ry1 = circle_roi or (0, 0, small.shape[1], small.shape[0])
+                found = detect_circles(
+                    small[ry0:ry1, rx0:rx1], min_circularity=0.65, min_area=2000, min_points=15,
+                    ransac_threshold=1.0, min_ring_width=5, max_ring_width=40)
+                if found:
+                    bx0, by0, bx1, by1 = found[0]['bbox']
+                    circle_roi = expand_bbox((bx0 + rx0, by0 + ry0, bx1 + rx0, by1 + ry0), small.shape)
+                    roi_missed = 0
+                elif circle_roi is not None:
+                    roi_missed += 1
+                    if roi_missed >= ROI_MISSES:
+                        circle_roi = None
+                circles = [scale_circle(c, 2, rx0, ry0) for c in found]
+                binary_image = preprocess_image(gray)
                 
                 results = []
-                output_image = frame.copy()
+                # Drawn on a copy, made only once something is drawn
+                output_image = frame
                 found_H = False
                 if circles:
                     circle = circles[0]
@@ -271,7 +378,8 @@ def detection_thread(template_contour, threshold):
                     if crop.size > 0:
                         h_results, _, _ = recognize_H(
                             crop, template_contour, threshold,
-                            min_area=2000, max_area=crop.shape[0] * crop.shape[1] * 0.5
+                            min_area=2000, max_area=crop.shape[0] * crop.shape[1] * 0.5,
+                            binary=binary_image[y0:y1, x0:x1], template_hu=template_hu
                         )
                         
 
@@ -285,6 +393,7 @@ def detection_thread(template_contour, threshold):
                         else:
                             radius = 0
 
+                        output_image = frame.copy()
                         cv2.circle(output_image, (cx, cy), int(radius), (255, 0, 255), 2)
                         cv2.circle(output_image, (cx, cy), 3, (255, 0, 255), -1)
 
@@ -311,7 +420,8 @@ def detection_thread(template_contour, threshold):
                     else:
                         frames_missed += 1
                 else:
-                    h_results, output_image, _ = recognize_H(frame, template_contour, threshold)
+                    h_results, output_image, _ = recognize_H(frame, template_contour, threshold,
+                                                             binary=binary_image, template_hu=template_hu)
                     for h_result in h_results:
                         x, y, w, h = h_result['bbox']
                         results.append({
@@ -325,15 +435,18 @@ def detection_thread(template_contour, threshold):
                         frames_missed = 0
                     else:
                         frames_missed += 1
-                if frames_missed >= n and circles:
-                    
+                retry_sig = tuple((c['center'], c.get('radius', c.get('radius_outer', c.get('ellipse_axes'))))
+                                  for c in circles)
+                if frames_missed >= n and circles and retry_sig != last_retry_sig:
+                    last_retry_sig = retry_sig
                     for circle in circles:
                         x0, y0, x1, y1 = circle['bbox']
                         crop = frame[y0:y1, x0:x1]
                         if crop.size > 0:
                             h_results, _, _ = recognize_H(
                                 crop, template_contour, threshold,
-                                min_area=2000, max_area=crop.shape[0] * crop.shape[1] * 0.5
+                                min_area=2000, max_area=crop.shape[0] * crop.shape[1] * 0.5,
+                                binary=binary_image[y0:y1, x0:x1], template_hu=template_hu
                             )
                             if h_results:
                                 cx, cy = circle['center']
@@ -346,6 +459,8 @@ def detection_thread(template_contour, threshold):
                                 else:
                                     radius = 0
 
+                                if output_image is frame:
+                                    output_image = frame.copy()
                                 cv2.circle(output_image, (cx, cy), int(radius), (0, 255, 255), 2)
                                 cv2.circle(output_image, (cx, cy), 3, (0, 255, 255), -1)
 
@@ -365,8 +480,12 @@ def detection_thread(template_contour, threshold):
                                 found_H = True
                                 frames_missed = 0
                                 break  
+                if found_H:
+                    last_retry_sig = None
 
-                binary_image = preprocess_image(frame)
+                if output_image is frame:
+                    # capture_frame's buffer is read-only and main() draws on this
+                    output_image = frame.copy()
 
                 if result_queue.full():
                     try:
@@ -376,13 +495,14 @@ def detection_thread(template_contour, threshold):
 
                 result_queue.put((results, output_image, binary_image, frame))
             else:
-                time.sleep(0.001)
+                # No frame (camera gone or not ready): back off instead of spinning on grab()
+                time.sleep(0.01)
         except Exception as e:
             print(f"Detection error: {e}")
             time.sleep(0.01)
 
 
-def main(show_ui=False, continuous_mode=False, callback_func=None):
+def main(show_ui=False, continuous_mode=False, callback_func=None, use_opencl=False):
     """
     Phát hiện landing pad và trả về thông tin chi tiết.
     
@@ -390,6 +510,7 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
         show_ui (bool): Hiển thị hình ảnh detection hay không. Default=False.
         continuous_mode (bool): Chạy liên tục và gọi callback mỗi frame. Default=False.
         callback_func (callable): Hàm callback nhận result_data mỗi frame (chỉ dùng khi continuous_mode=True).
+        use_opencl (bool): Chạy các bộ lọc ảnh qua OpenCL (UMat) nếu máy có thiết bị OpenCL. Default=False.
     
     Returns:
         dict: {
@@ -406,7 +527,7 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
             'direction': str            
         }
     """
-    global running
+    global running, USE_UMAT
     running = True
     
     template_path = "./templates/H.png"
@@ -437,11 +558,14 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
         camera_config = {'format': 'RGB888', 'size': (640, 480)}
         
         camera = cam_manager.get_camera(camera_id, user_id, camera_config)
+        USE_UMAT = use_opencl and cv2.ocl.haveOpenCL()
+        if use_opencl and not USE_UMAT:
+            print("OpenCL requested but not available, filters stay on CPU")
         
-        capture_worker = Thread(target=capture_thread, args=(cam_manager, camera_id, user_id), daemon=True)
-        detection_worker = Thread(target=detection_thread, args=(template_contour, threshold), daemon=True)
+        detection_worker = Thread(target=detection_thread,
+                                  args=(template_contour, threshold, cam_manager, camera_id, user_id),
+                                  daemon=True)
         
-        capture_worker.start()
         detection_worker.start()
         time.sleep(0.5)
         if show_ui:
@@ -450,9 +574,13 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
                 
         
         
+        # Windows are refreshed on every DISPLAY_EVERY-th result; waitKey still runs each pass
+        display_counter = 0
         while True:
             if not result_queue.empty():
                 results, output_image, binary_image, original_frame = result_queue.get()
+                display_counter += 1
+                display_now = show_ui and display_counter % DISPLAY_EVERY == 0
                 
                 detection_history.append(len(results) > 0)
                 stable_detection = sum(detection_history) >= 7
@@ -527,9 +655,10 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
                         result_data['circle_radius'] = result['circle_radius']
                     
                     
-                    if show_ui:
+                    # A one-shot run always shows the frame it stops on
+                    if display_now or (show_ui and not continuous_mode):
                         cv2.imshow('H Detection', output_image)
-                        cv2.imshow('Binary', binary_image)
+                        cv2.imshow('Binary', cv2.pyrDown(binary_image))
                     
                     
                     if callback_func is not None:
@@ -548,11 +677,11 @@ def main(show_ui=False, continuous_mode=False, callback_func=None):
                     result_data['distance'] = 0.0
                     result_data['direction'] = 'NONE'
                     
-                    if show_ui:
+                    if display_now:
                         cv2.putText(output_image, "Searching...", (10, 30), 
                                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                         cv2.imshow('H Detection', output_image)
-                        cv2.imshow('Binary', binary_image)
+                        cv2.imshow('Binary', cv2.pyrDown(binary_image))
                     
                     
                     if continuous_mode and callback_func is not None:
@@ -2,9 +2,64 @@
 """Test detection on live camera"""
 import cv2
 import find
-import time
+import logging
+from threading import Thread, Condition
 from camera_manager import get_camera_manager
 
+# Run detection on every Nth camera frame; the others are only grabbed, not decoded
+PROCESS_EVERY = 3
+
+
+class FrameGrabber(Thread):
+    """Reads the camera on its own thread so capture overlaps with detection and display
+    
+    Uses the manager's VideoCapture directly, without its slot lock: this script
+    must be the camera's only user.
+    """
+    
+    def __init__(self, camera):
+        super().__init__(name="frame-grabber", daemon=True)
+        self.camera = camera
+        self.ready = Condition()
+        self.latest = None
+        self.grabbed = 0
+        self.failed = False
+        self.running = True
+    
+    def run(self):
+        while self.running:
+            # grab() only advances the stream, retrieve() decodes
+            if not self.camera.grab():
+                self._fail()
+                return
+            self.grabbed += 1
+            if self.grabbed % PROCESS_EVERY:
+                continue
+            ret, frame = self.camera.retrieve()
+            if not ret:
+                self._fail()
+                return
+            with self.ready:
+                self.latest = frame
+                self.ready.notify()
+    
+    def _fail(self):
+        with self.ready:
+            self.failed = True
+            self.ready.notify()
+    
+    def take(self, timeout=0.5):
+        """Wait for a frame not handed out yet; None on timeout or camera failure"""
+        with self.ready:
+            self.ready.wait_for(lambda: self.latest is not None or self.failed, timeout)
+            frame, self.latest = self.latest, None
+        return frame
+    
+    def stop(self):
+        self.running = False
+        self.join(timeout=1.0)
+
+
 def test_detection():
     """Test detection with live camera display"""
     print("[TEST] Starting detection test...")
@@ -34,13 +89,18 @@ def test_detection():
     print("[INFO] Capturing frames... Press 'q' to quit")
     print("-" * 60)
     
+    grabber = FrameGrabber(camera)
+    grabber.start()
+    
     while True:
         try:
-            # Capture frame
-            ret, frame = camera.read()
-            if not ret:
-                print("[ERROR] Failed to read frame")
-                break
+            # Latest frame from the grabber thread
+            frame = grabber.take()
+            if frame is None:
+                if grabber.failed:
+                    print("[ERROR] Failed to read frame")
+                    break
+                continue
             
             # BGR to RGB
             frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -98,8 +158,6 @@ def test_detection():
                 cv2.imwrite(f"detection_result_{frame_count}.png", frame_bgr)
                 print(f"[SAVE] Saved detection_result_{frame_count}.png")
             
-            time.sleep(0.03)  # ~30 FPS
-            
         except KeyboardInterrupt:
             print("\n[INTERRUPT] User interrupted")
             break
@@ -107,7 +165,9 @@ def test_detection():
             print(f"[ERROR] {e}")
             break
     
-    print(f"\n[STATS] Total frames: {frame_count}")
+    grabber.stop()
+    
+    print(f"\n[STATS] Total frames: {frame_count} (grabbed: {grabber.grabbed})")
     print(f"[STATS] Detections: {detected_count}")
     print(f"[STATS] Detection rate: {detected_count/frame_count*100:.1f}%")
     
@@ -116,4 +176,5 @@ def test_detection():
     print("[OK] Test completed")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     test_detection()